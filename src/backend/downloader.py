@@ -13,11 +13,25 @@ import re
 import logging
 import atexit
 import shutil
+import statistics
+from collections import deque
 from typing import Any, Callable
 from pathlib import Path
-import requests
 from concurrent.futures import ThreadPoolExecutor
-from bs4 import BeautifulSoup
+
+# torrent状态查询标志：进度、状态、速率、peer/seed数等基础字段不依赖任何标志，
+# 传0可让libtorrent跳过pieces位图、分布副本数、torrent_info等额外字段的计算
+_STATUS_FLAGS = 0
+
+try:
+    import libtorrent as lt
+    _HAS_LT = True
+    # 稀疏存储模式（storage_mode_sparse）
+    _SPARSE_STORAGE = lt.storage_mode_t(2)
+except ImportError:
+    lt = None
+    _HAS_LT = False
+    _SPARSE_STORAGE = None
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +41,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger('Downloader')
 
+# tracker列表获取失败时使用的默认tracker
+_DEFAULT_TRACKERS: tuple[str, ...] = (
+    "udp://tracker.opentrackr.org:1337/announce",
+    "udp://open.demonii.com:1337/announce",
+    "udp://open.stealth.si:80/announce",
+    "udp://tracker.torrent.eu.org:451/announce",
+    "udp://tracker.coppersurfer.tk:6969/announce",
+)
+
+# DHT bootstrap节点
+_DHT_BOOTSTRAP: tuple[tuple[str, int], ...] = (
+    ('dht.libtorrent.org', 25401),
+    ('router.bittorrent.com', 6881),
+    ('router.utorrent.com', 6881),
+    ('dht.transmissionbt.com', 6881),
+)
+
+_MB = 1024 * 1024
+
+
+def _info_hash_key(info_hashes: Any) -> str:
+    """将libtorrent的info_hash_t转换为可用作字典键的十六进制字符串"""
+    return str(info_hashes.get_best())
+
 
 class DownloadError(Exception):
     """下载错误"""
@@ -53,11 +91,32 @@ class Downloader:
             project_root = Path(__file__).parent.parent.parent
             self.temp_dir = project_root / "data" / "tmp"
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        # BT测速使用的持久目录，测速结束后由libtorrent删除本次写入的文件和目录
+        self._bt_test_dir: Path = self.temp_dir / 'bt_test'
+        self._bt_test_dir.mkdir(parents=True, exist_ok=True)
         self.download_tasks: dict[str, dict[str, Any]] = {}
+        # BT任务的高频状态字段快照（progress/downloaded/speed），整体替换字典，读取无需加锁
+        self._task_snapshot: dict[str, dict[str, Any]] = {}
         self._lock: threading.Lock = threading.Lock()
         # 跟踪所有curl子进程以及按任务跟踪，用于取消和退出清理
         self._active_processes: list[subprocess.Popen[str]] = []
         self._task_processes: dict[str, list[subprocess.Popen[str]]] = {}
+        # libtorrent session 在首次BT操作时创建并在同类BT操作间共享（保留DHT路由表和端口绑定）；
+        # key为是否用于测速：测速torrent使用单独的session，不占用正式下载的活跃数限制，也不会与同一链接的下载冲突
+        self._lt_sessions: dict[bool, Any] = {}
+        self._lt_session_lock: threading.Lock = threading.Lock()
+        # alert处理线程缓存的torrent状态及收到该状态的时间（key为torrent handle），收到alert时通过条件变量唤醒等待者
+        self._lt_status: dict[Any, tuple[Any, float]] = {}
+        self._lt_alert_cond: threading.Condition = threading.Condition()
+        # 正在移除、尚未收到torrent_removed_alert的torrent：{(id(session), info-hash)}
+        self._lt_removing: set[tuple[int, str]] = set()
+        # BT测速按torrent排队：共享session中同一info-hash只能有一个handle，并发测速同一链接时依次进行；
+        # {torrent_path: [锁, 持有及等待者数量]}，数量归零时删除条目
+        self._bt_test_locks: dict[str, list[Any]] = {}
+        # BT下载共用的有界线程池，避免每个任务新建线程
+        self._bt_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='bt-dl')
+        # 关闭标志：线程池工作线程不是守护线程，后端退出前由close()设置，让BT循环主动结束
+        self._closing: threading.Event = threading.Event()
         atexit.register(self._cleanup_processes)
 
     def _register_process(self, process: subprocess.Popen[str], task_id: str | None = None) -> None:
@@ -110,6 +169,19 @@ class Downloader:
         finally:
             self._unregister_process(process)
 
+    def close(self) -> None:
+        """
+        关闭下载器：通知所有BT下载/测速循环退出，并取消线程池中尚未开始的任务
+        
+        线程池工作线程不是守护线程，解释器退出时会等待它们结束，
+        因此后端主循环结束前必须调用此方法，否则进行中的BT任务会阻塞进程退出
+        """
+        self._closing.set()
+        # 唤醒正在等待alert的循环，使其立即检查关闭标志
+        with self._lt_alert_cond:
+            self._lt_alert_cond.notify_all()
+        self._bt_executor.shutdown(wait=False, cancel_futures=True)
+
     def cancel_download(self, task_id: str) -> bool:
         """
         取消指定任务的下载，终止相关curl进程并更新任务状态
@@ -131,6 +203,10 @@ class Downloader:
             if task:
                 task["status"] = "cancelled"
                 task["speed"] = 0
+                # 线程池中尚未开始的BT下载直接取消
+                future = task.get("future")
+                if future:
+                    future.cancel()
             if task_id in self._task_processes:
                 del self._task_processes[task_id]
         return True
@@ -165,6 +241,8 @@ class Downloader:
     
     def _download_curl_from_curl_se_windows(self, target_dir: str):
         """从curl.se/windows下载并解压curl"""
+        import requests
+        from bs4 import BeautifulSoup
         import zipfile
         import tempfile
         
@@ -175,7 +253,7 @@ class Downloader:
         response.raise_for_status()
         
         # 解析HTML页面，查找最新的下载链接
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(response.text, 'lxml')
         curl_zip_url = None
         
         # 查找所有链接，寻找zip文件
@@ -218,7 +296,7 @@ class Downloader:
                 dl_url = "https://curl.se/windows/dl-8_17_0/"
                 dl_response = requests.get(dl_url, timeout=10)
                 if dl_response.status_code == 200:
-                    dl_soup = BeautifulSoup(dl_response.text, 'html.parser')
+                    dl_soup = BeautifulSoup(dl_response.text, 'lxml')
                     for link in dl_soup.find_all('a', href=True):
                         href = str(link.get('href', ''))
                         if href.endswith('.zip') and 'win64' in href.lower():
@@ -316,6 +394,8 @@ class Downloader:
         Returns:
             延迟时间（毫秒），失败返回-1
         """
+        import requests
+        
         try:
             start_time = time.time()
             response = requests.head(url, timeout=timeout, allow_redirects=True)
@@ -337,6 +417,8 @@ class Downloader:
         Returns:
             {"speed": 速度(字节/秒), "latency": 延迟(毫秒)}，失败返回-1
         """
+        import requests
+        
         try:
             # 使用HEAD请求获取文件大小
             head_response = requests.head(url, timeout=timeout, allow_redirects=True)
@@ -386,16 +468,10 @@ class Downloader:
         
         file_size = os.path.getsize(file_path)
         
-        # 计算SHA256
-        sha256_hash = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            while True:
-                chunk = f.read(8192)
-                if not chunk:
-                    break
-                sha256_hash.update(chunk)
-        
-        calculated_sha256 = sha256_hash.hexdigest()
+        # 计算SHA256：hashlib.file_digest复用一个256KB缓冲区循环readinto()并更新摘要，
+        # 不必为每个块分配新的bytes对象；无缓冲打开文件，避免读入时经过BufferedReader再复制一次
+        with open(file_path, 'rb', buffering=0) as f:
+            calculated_sha256 = hashlib.file_digest(f, 'sha256').hexdigest()
         
         valid = True
         if expected_sha256:
@@ -731,6 +807,8 @@ class Downloader:
         progress_callback: Callable[[float, int, int], None] | None
     ) -> str:
         """使用requests作为备选下载方法"""
+        import requests
+        
         task_id = str(uuid.uuid4())
         
         with self._lock:
@@ -793,11 +871,13 @@ class Downloader:
     
     def get_download_progress(self, task_id: str) -> dict[str, Any]:
         """获取下载进度"""
+        # 先取快照再读任务状态：任务结束时先写终态再删除快照，避免用旧快照覆盖终态
+        snap = self._task_snapshot.get(task_id)
         with self._lock:
             task = self.download_tasks.get(task_id)
             if not task:
                 return {"error": "Task does not exist"}
-            return {
+            result = {
                 "status": task["status"],
                 "progress": task["progress"],
                 "downloaded": task["downloaded"],
@@ -805,6 +885,9 @@ class Downloader:
                 "speed": task.get("speed", 0),
                 "error": task.get("error")
             }
+        if snap and result["status"] == "downloading":
+            result.update(snap)
+        return result
     
     def _get_tracker_list(self) -> list:
         """
@@ -813,41 +896,35 @@ class Downloader:
         Returns:
             tracker URL列表
         """
+        import requests
+        
         try:
             # 从GitHub获取tracker列表
             tracker_url = "https://raw.githubusercontent.com/ngosang/trackerslist/master/trackers_all.txt"
             response = requests.get(tracker_url, timeout=10)
             response.raise_for_status()
             
-            # 解析tracker列表
-            trackers = []
-            for line in response.text.split('\n'):
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    trackers.append(line)
+            # 直接按字节解析tracker列表（tracker URL均为ASCII，无需先解码整个文本）
+            lines = (line.strip() for line in response.content.splitlines())
+            trackers = [line.decode('ascii', 'ignore') for line in lines if line and not line.startswith(b'#')]
             
             logger.info(f"Retrieved {len(trackers)} trackers")
             return trackers
         except Exception as e:
             logger.warning(f"Failed to get tracker list: {e}, using default trackers")
             # 返回一些常用的默认tracker
-            return [
-                "udp://tracker.opentrackr.org:1337/announce",
-                "udp://open.demonii.com:1337/announce",
-                "udp://open.stealth.si:80/announce",
-                "udp://tracker.torrent.eu.org:451/announce",
-                "udp://tracker.coppersurfer.tk:6969/announce",
-            ]
+            return list(_DEFAULT_TRACKERS)
     
-    def _create_optimized_session(self):
+    def _create_optimized_session(self, *, enable_port_mapping: bool = True):
         """
         创建并优化libtorrent session配置
         
+        Args:
+            enable_port_mapping: 是否启用UPnP/NAT-PMP端口映射（测速等短时探测不需要外网入站连接）
+        
         Returns:
             优化后的libtorrent session对象
         """
-        import libtorrent as lt
-        
         # 创建session
         ses = lt.session()
         
@@ -857,8 +934,8 @@ class Downloader:
         # 启用并加强peer发现机制
         settings['enable_dht'] = True
         settings['enable_lsd'] = True  # Local Service Discovery
-        settings['enable_upnp'] = True  # UPnP端口映射
-        settings['enable_natpmp'] = True  # NAT-PMP端口映射
+        settings['enable_upnp'] = enable_port_mapping  # UPnP端口映射
+        settings['enable_natpmp'] = enable_port_mapping  # NAT-PMP端口映射
         
         # 提高连接aggressiveness
         settings['connections_limit'] = 500  # 增加最大连接数（默认200）
@@ -891,12 +968,35 @@ class Downloader:
         settings['enable_incoming_tcp'] = True
         settings['enable_outgoing_tcp'] = True
         
+        # 只订阅需要的alert类别（元数据/状态更新、进度、错误）
+        settings['alert_mask'] = (
+            lt.alert.category_t.status_notification
+            | lt.alert.category_t.error_notification
+            | lt.alert.category_t.progress_notification
+        )
+        
         # 应用设置
         try:
             ses.apply_settings(settings)
         except Exception as e:
             logger.warning(f"Failed to apply some settings: {e}, continuing with default settings")
         
+        # 大文件下载的磁盘I/O设置（部分设置在libtorrent 2.x中已移除，逐项应用以免影响其他设置）
+        disk_settings = {
+            'aio_threads': 4,  # 异步磁盘I/O线程数
+            'hashing_threads': 2,  # piece校验线程数
+            'send_buffer_watermark': 10 * 1024 * 1024,
+            'max_queued_disk_bytes': 16 * 1024 * 1024,  # 磁盘写入队列上限
+            'coalesce_reads': True,  # 合并小块读
+            'coalesce_writes': True,  # 合并小块写
+            'mixed_mode_algorithm': int(lt.bandwidth_mixed_algo_t.prefer_tcp),
+        }
+        for key, value in disk_settings.items():
+            try:
+                ses.apply_settings({key: value})
+            except Exception as e:
+                logger.debug(f"Skipping unsupported setting {key}: {e}")
+        
         # 监听端口
         ses.listen_on(6881, 6891)
         
@@ -904,10 +1004,8 @@ class Downloader:
         try:
             ses.start_dht()
             # 添加DHT bootstrap节点
-            ses.add_dht_node(('dht.libtorrent.org', 25401))
-            ses.add_dht_node(('router.bittorrent.com', 6881))
-            ses.add_dht_node(('router.utorrent.com', 6881))
-            ses.add_dht_node(('dht.transmissionbt.com', 6881))
+            for host, port in _DHT_BOOTSTRAP:
+                ses.add_dht_node((host, port))
             logger.debug("DHT started")
         except Exception as e:
             logger.warning(f"DHT startup failed: {e}")
@@ -920,33 +1018,219 @@ class Downloader:
             logger.warning(f"LSD startup failed: {e}")
         
         # 启动UPnP和NAT-PMP
+        if enable_port_mapping:
+            self._start_port_mapping(ses)
+        
+        return ses
+    
+    def _start_port_mapping(self, ses) -> None:
+        """
+        启动UPnP和NAT-PMP端口映射
+        
+        Args:
+            ses: libtorrent session对象
+        """
         try:
+            ses.apply_settings({'enable_upnp': True, 'enable_natpmp': True})
             ses.start_upnp()
             ses.start_natpmp()
             logger.debug("UPnP/NAT-PMP started")
         except Exception as e:
             logger.warning(f"UPnP/NAT-PMP startup failed: {e}")
+    
+    def _get_session(self, *, for_test: bool = False):
+        """
+        获取共享的libtorrent session，首次调用时创建
         
+        正式下载和测速各用一个session：测速torrent不计入下载session的active_downloads/active_limit，
+        不会使正式下载被自动管理排队；同一链接的测速和下载也不会因info-hash重复而冲突
+        
+        Args:
+            for_test: 是否获取测速/延迟测试使用的session（不启动UPnP/NAT-PMP端口映射）
+        
+        Returns:
+            共享的libtorrent session对象
+        """
+        ses = self._lt_sessions.get(for_test)
+        if ses is None:
+            with self._lt_session_lock:
+                ses = self._lt_sessions.get(for_test)
+                if ses is None:
+                    ses = self._create_optimized_session(enable_port_mapping=not for_test)
+                    thread = threading.Thread(target=self._alert_loop, args=(ses,), daemon=True)
+                    thread.start()
+                    self._lt_sessions[for_test] = ses
         return ses
     
-    def _add_trackers_to_handle(self, handle, trackers: list):
+    def _alert_loop(self, ses) -> None:
         """
-        添加tracker到torrent handle
+        后台处理libtorrent alert：每秒请求一次状态更新，缓存torrent状态并唤醒等待者
         
         Args:
-            handle: libtorrent torrent handle
-            trackers: tracker URL列表
+            ses: libtorrent session对象
         """
-        try:
-            for tracker_url in trackers:
-                try:
-                    handle.add_tracker({'url': tracker_url, 'tier': 0})
-                except Exception as e:
-                    # 某些tracker可能无效，继续添加其他的
+        last_post = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now - last_post >= 1.0:
+                    ses.post_torrent_updates(_STATUS_FLAGS)
+                    last_post = now
+                
+                ses.wait_for_alert(1000)
+                alerts = ses.pop_alerts()
+                if not alerts:
                     continue
-            logger.debug(f"Added {len(trackers)} trackers")
-        except Exception as e:
-            logger.warning(f"Failed to add trackers: {e}")
+                
+                received = time.monotonic()
+                with self._lt_alert_cond:
+                    for alert in alerts:
+                        if isinstance(alert, lt.state_update_alert):
+                            for status in alert.status:
+                                self._lt_status[status.handle] = (status, received)
+                        elif isinstance(alert, lt.torrent_error_alert):
+                            logger.warning(f"BT torrent error: {alert.message()}")
+                        elif isinstance(alert, lt.torrent_removed_alert):
+                            self._lt_removing.discard((id(ses), _info_hash_key(alert.info_hashes)))
+                        elif isinstance(alert, lt.torrent_delete_failed_alert):
+                            logger.warning(f"BT torrent file deletion failed: {alert.message()}")
+                    self._lt_alert_cond.notify_all()
+            except Exception as e:
+                logger.warning(f"BT alert processing failed: {e}")
+                time.sleep(1)
+    
+    def _wait_for_bt_alert(self, timeout: float = 1.0) -> None:
+        """阻塞等待下一批libtorrent alert，最长等待timeout秒"""
+        with self._lt_alert_cond:
+            self._lt_alert_cond.wait(timeout)
+    
+    def _get_torrent_status(self, handle):
+        """获取alert缓存的torrent状态，尚未收到状态更新时直接查询handle"""
+        return self._get_torrent_status_at(handle)[0]
+    
+    def _get_torrent_status_at(self, handle) -> tuple[Any, float]:
+        """
+        获取torrent状态及其采样时间
+        
+        缓存的状态约每秒才由alert线程刷新一次，按轮询时刻计算速度会得到零或翻倍的样本；
+        返回收到该状态alert的时间，调用方据此计算两次状态之间的真实间隔
+        """
+        with self._lt_alert_cond:
+            cached = self._lt_status.get(handle)
+        if cached is not None:
+            return cached
+        return handle.status(_STATUS_FLAGS), time.monotonic()
+    
+    def _remove_torrent(self, ses, handle, delete_files: bool = False) -> None:
+        """
+        从session移除torrent并清理缓存的状态
+        
+        Args:
+            ses: libtorrent session对象
+            handle: torrent handle
+            delete_files: 是否同时删除已下载的文件。移除是异步的，由libtorrent在关闭文件句柄后
+                删除文件及其创建的目录，删除失败时通过torrent_delete_failed_alert记录日志
+        """
+        # 按info-hash匹配torrent_removed_alert（alert中的handle已失效）
+        key = (id(ses), _info_hash_key(handle.info_hashes()))
+        with self._lt_alert_cond:
+            self._lt_removing.add(key)
+        if delete_files:
+            ses.remove_torrent(handle, lt.session.delete_files)
+        else:
+            ses.remove_torrent(handle)
+        # 移除是异步的：等待torrent_removed_alert后再返回，避免随后再次添加同一torrent时触发重复错误
+        with self._lt_alert_cond:
+            removed = self._lt_alert_cond.wait_for(
+                lambda: key not in self._lt_removing or self._closing.is_set(), timeout=5.0)
+            self._lt_removing.discard(key)
+            self._lt_status.pop(handle, None)
+        if not removed:
+            logger.warning(f"Timed out waiting for BT torrent removal ({key[1]}), re-adding it may fail as duplicate")
+    
+    def _acquire_bt_test_slot(
+        self,
+        torrent_path: str,
+        timeout: int | None = None,
+        cancel_check: Callable[[], bool] | None = None
+    ) -> bool:
+        """
+        获取同一torrent的测速执行权（同一链接的并发测速排队执行）
+        
+        获取成功后调用方必须调用_release_bt_test_slot释放
+        
+        Args:
+            torrent_path: torrent文件路径或磁力链接
+            timeout: 最长等待时间（秒），None表示不限制
+            cancel_check: 取消检查函数
+        
+        Returns:
+            是否获取成功，超时、取消或后端关闭时返回False
+        """
+        with self._lock:
+            entry = self._bt_test_locks.setdefault(torrent_path, [threading.Lock(), 0])
+            entry[1] += 1
+        lock = entry[0]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not lock.acquire(timeout=0.5):
+            if self._closing.is_set() or (cancel_check and cancel_check()):
+                self._drop_bt_test_slot(torrent_path, entry)
+                return False
+            if deadline is not None and time.monotonic() > deadline:
+                logger.warning("Timed out waiting for another BT test of the same torrent")
+                self._drop_bt_test_slot(torrent_path, entry)
+                return False
+        return True
+    
+    def _release_bt_test_slot(self, torrent_path: str) -> None:
+        """释放_acquire_bt_test_slot获取的测速执行权"""
+        with self._lock:
+            entry = self._bt_test_locks[torrent_path]
+        entry[0].release()
+        self._drop_bt_test_slot(torrent_path, entry)
+    
+    def _drop_bt_test_slot(self, torrent_path: str, entry: list[Any]) -> None:
+        """减少测速锁的引用计数，没有持有者和等待者时删除条目，避免字典随链接数增长"""
+        with self._lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._bt_test_locks[torrent_path]
+    
+    def _build_torrent_params(self, torrent_path: str, save_path: str, trackers: list, *, auto_managed: bool = True):
+        """
+        构建add_torrent参数，tracker列表随参数一次性交给libtorrent
+        
+        Args:
+            torrent_path: torrent文件路径或磁力链接
+            save_path: 保存目录
+            trackers: 额外的tracker URL列表
+            auto_managed: 是否由session自动管理排队；测速torrent直接启动，不参与排队
+        
+        Returns:
+            libtorrent add_torrent_params对象
+        """
+        if torrent_path.startswith('magnet:'):
+            # 磁力链接（保留链接中自带的tr参数）
+            params = lt.parse_magnet_uri(torrent_path)
+        else:
+            # torrent文件
+            params = lt.add_torrent_params()
+            params.ti = lt.torrent_info(torrent_path)
+        
+        params.save_path = save_path
+        params.storage_mode = _SPARSE_STORAGE
+        # session在所有BT操作间共享：同一info-hash已存在时报错，而不是返回别人正在使用的handle
+        params.flags |= lt.torrent_flags.duplicate_is_error
+        if not auto_managed:
+            # 默认参数为自动管理+暂停（由session排队后恢复），不自动管理时需同时清除暂停标志
+            params.flags &= ~(lt.torrent_flags.auto_managed | lt.torrent_flags.paused)
+        
+        # 合并并去重tracker，全部放在tier 0
+        all_trackers = list(dict.fromkeys([*params.trackers, *trackers]))
+        params.trackers = all_trackers
+        params.tracker_tiers = [0] * len(all_trackers)
+        logger.debug(f"Added {len(all_trackers)} trackers")
+        return params
     
     def test_bt_latency(self, torrent_path: str, timeout: int | None = None) -> float:
         """
@@ -959,46 +1243,44 @@ class Downloader:
         Returns:
             延迟时间（毫秒），失败返回-1
         """
+        if not _HAS_LT:
+            logger.warning("libtorrent not available")
+            return -1
+        
+        if not self._acquire_bt_test_slot(torrent_path, timeout):
+            return -1
+        
+        handle = None
         try:
-            import libtorrent as lt
-            
-            # 创建优化的session
-            ses = self._create_optimized_session()
+            # 获取测速共享的session
+            ses = self._get_session(for_test=True)
             
             # 获取tracker列表
             trackers = self._get_tracker_list()
             
-            # 解析torrent或磁力链接
-            if torrent_path.startswith('magnet:'):
-                # 磁力链接
-                save_path = os.path.dirname(os.path.abspath('.')) or '.'
-                params = {
-                    'save_path': save_path,
-                    'storage_mode': lt.storage_mode_t(2),
-                }
-                handle = lt.add_magnet_uri(ses, torrent_path, params)
-            else:
-                # torrent文件
-                info = lt.torrent_info(torrent_path)
-                save_path = os.path.dirname(os.path.abspath('.')) or '.'
-                handle = ses.add_torrent(info, save_path)
-            
-            # 添加tracker
-            self._add_trackers_to_handle(handle, trackers)
+            # 解析torrent或磁力链接，tracker随参数一并添加
+            save_path = os.path.dirname(os.path.abspath('.')) or '.'
+            handle = ses.add_torrent(self._build_torrent_params(torrent_path, save_path, trackers, auto_managed=False))
             
             # 等待元数据
-            start_time = time.time()
+            start_time = time.monotonic()
             last_print_time = start_time
+            # 等待超时从20ms起按1.5倍退避至500ms：元数据很快到达时能及时发现，长时间等待时减少唤醒次数
+            wait = 0.02
             while not handle.has_metadata():
-                current_time = time.time()
+                if self._closing.is_set():
+                    return -1
+                
+                current_time = time.monotonic()
                 if current_time - last_print_time >= 5.0:
-                    logger.debug(f"Waiting for BT metadata... ({current_time - start_time:.1f}s)")
+                    logger.debug("Waiting for BT metadata... (%.1fs)", current_time - start_time)
                     last_print_time = current_time
                 if timeout is not None and current_time - start_time > timeout:
                     logger.warning("BT metadata retrieval timeout")
-                    ses.remove_torrent(handle)
                     return -1
-                time.sleep(0.1)
+                # 等待metadata_received_alert唤醒
+                self._wait_for_bt_alert(wait)
+                wait = min(wait * 1.5, 0.5)
             
             # 获取tracker信息并测试延迟
             trackers = handle.trackers()
@@ -1008,17 +1290,17 @@ class Downloader:
             # 测试第一个tracker的延迟
             first_tracker = trackers[0]
             # 注意：libtorrent不直接提供tracker延迟，这里使用连接建立时间作为近似
-            latency = (time.time() - start_time) * 1000
-            
-            ses.remove_torrent(handle)
+            latency = (time.monotonic() - start_time) * 1000
             return latency
             
-        except ImportError:
-            logger.warning("libtorrent not available")
-            return -1
         except Exception as e:
             logger.error(f"BT latency test failed: {e}")
             return -1
+        finally:
+            # 共享session不会随本次调用销毁，任何退出路径都必须移除torrent
+            if handle is not None:
+                self._remove_torrent(ses, handle)
+            self._release_bt_test_slot(torrent_path)
     
     def test_bt_download_speed(
         self,
@@ -1038,57 +1320,52 @@ class Downloader:
         Returns:
             {"speed": 速度(字节/秒), "latency": 延迟(毫秒), "peers": 节点数, "seeds": 种子数}
         """
+        if not _HAS_LT:
+            logger.warning("libtorrent not available")
+            return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
+        
+        if not self._acquire_bt_test_slot(torrent_path, timeout, cancel_check):
+            return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
+        
+        handle = None
         try:
-            import libtorrent as lt
-            
-            # 创建优化的session
-            ses = self._create_optimized_session()
+            # 获取测速共享的session
+            ses = self._get_session(for_test=True)
             
             # 获取tracker列表
             trackers = self._get_tracker_list()
             
             # 解析torrent或磁力链接
             # 使用统一的临时目录
-            temp_dir = str(self.temp_dir / 'bt_test')
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            if torrent_path.startswith('magnet:'):
-                # 磁力链接
-                params = {
-                    'save_path': temp_dir,
-                    'storage_mode': lt.storage_mode_t(2),
-                }
-                handle = lt.add_magnet_uri(ses, torrent_path, params)
-            else:
-                # torrent文件
-                info = lt.torrent_info(torrent_path)
-                handle = ses.add_torrent(info, temp_dir)
+            temp_dir = str(self._bt_test_dir)
             
-            # 添加tracker
-            self._add_trackers_to_handle(handle, trackers)
+            handle = ses.add_torrent(self._build_torrent_params(torrent_path, temp_dir, trackers, auto_managed=False))
             
             # 等待元数据
-            start_time = time.time()
+            start_time = time.monotonic()
             last_print_time = start_time
             logger.info("Retrieving BT metadata...")
+            wait = 0.02
             while not handle.has_metadata():
-                # 检查取消标志
-                if cancel_check and cancel_check():
+                # 检查取消标志（后端关闭时同样视为取消）
+                if self._closing.is_set() or (cancel_check and cancel_check()):
                     logger.info("BT test cancelled during metadata retrieval")
-                    ses.remove_torrent(handle)
                     return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
                 
-                current_time = time.time()
+                current_time = time.monotonic()
                 if current_time - last_print_time >= 5.0:
-                    logger.debug(f"Waiting for BT metadata... ({current_time - start_time:.1f}s)")
+                    logger.debug("Waiting for BT metadata... (%.1fs)", current_time - start_time)
                     last_print_time = current_time
                 if timeout is not None and current_time - start_time > timeout:
                     logger.warning("BT metadata retrieval timeout")
-                    ses.remove_torrent(handle)
                     return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
-                time.sleep(0.1)
+                # 等待metadata_received_alert唤醒
+                self._wait_for_bt_alert(wait)
+                wait = min(wait * 1.5, 0.5)
             
-            logger.info(f"BT metadata retrieval successful, elapsed: {time.time() - start_time:.1f}s")
+            # 元数据获取耗时即为延迟（与test_bt_latency的测量方式一致），无需再单独测试
+            latency = (time.monotonic() - start_time) * 1000
+            logger.info(f"BT metadata retrieval successful, elapsed: {latency / 1000:.1f}s")
             
             # 获取文件信息
             info = handle.get_torrent_info()
@@ -1096,7 +1373,6 @@ class Downloader:
             
             # 选择第一个文件进行下载测试
             if files.num_files() == 0:
-                ses.remove_torrent(handle)
                 return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
             
             # 设置优先级，只下载第一个文件的前test_size字节
@@ -1105,60 +1381,73 @@ class Downloader:
             test_pieces = min(test_size, file_size) // info.piece_length() + 1
             
             # 设置文件优先级
-            file_priorities = [0] * files.num_files()
+            file_priorities = bytearray(files.num_files())
             file_priorities[file_index] = 1
-            handle.prioritize_files(file_priorities)
+            handle.prioritize_files(list(file_priorities))
             
-            # 设置piece优先级（只下载前test_pieces个pieces）
-            piece_priorities = [0] * info.num_pieces()
-            for i in range(min(test_pieces, info.num_pieces())):
-                piece_priorities[i] = 1
-            handle.prioritize_pieces(piece_priorities)
+            # 设置piece优先级（只下载前test_pieces个pieces），一次切片赋值代替逐个piece循环
+            num_pieces = info.num_pieces()
+            num_test_pieces = min(test_pieces, num_pieces)
+            piece_priorities = bytearray(num_pieces)
+            piece_priorities[:num_test_pieces] = b'\x01' * num_test_pieces
+            handle.prioritize_pieces(list(piece_priorities))
             
             # 开始下载并监控速度
-            download_start = time.time()
+            download_start = time.monotonic()
             last_downloaded = 0
             last_time = download_start
-            speed_samples = []
+            # 只保留最近10个每秒速度样本，用于判断速度是否已收敛
+            speed_samples: deque[float] = deque(maxlen=10)
+            converged = False
+            # 判定收敛所用的最近样本（不含起步阶段），收敛时速度结果也由这些样本计算
+            recent: list[float] = []
             peers = 0
             seeds = 0
             last_status_time = download_start
             
-            logger.info(f"Starting BT download test, target size: {test_size / 1024 / 1024:.2f} MB")
+            logger.info(f"Starting BT download test, target size: {test_size / _MB:.2f} MB")
             
             while True:
-                # 检查取消标志
-                if cancel_check and cancel_check():
+                # 检查取消标志（后端关闭时同样视为取消）
+                if self._closing.is_set() or (cancel_check and cancel_check()):
                     logger.info("BT test cancelled during download")
-                    ses.remove_torrent(handle)
                     return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
                 
-                status = handle.status()
+                status, status_time = self._get_torrent_status_at(handle)
                 downloaded = status.total_download
                 peers = status.num_peers
                 seeds = status.num_seeds
                 
                 # 每5秒输出一次状态
-                current_time = time.time()
+                current_time = time.monotonic()
                 if current_time - last_status_time >= 5.0:
-                    logger.debug(f"BT download status: {downloaded / 1024 / 1024:.2f} MB / {test_size / 1024 / 1024:.2f} MB, "
-                          f"peers: {peers}, seeds: {seeds}, progress: {status.progress * 100:.1f}%")
+                    # 使用%格式化参数，debug级别未开启时不做格式化和单位换算
+                    logger.debug("BT download status: %.2f MB / %.2f MB, peers: %d, seeds: %d, progress: %.1f%%",
+                                 downloaded / _MB, test_size / _MB, peers, seeds, status.progress * 100)
                     last_status_time = current_time
                 
                 elapsed = current_time - download_start
                 
-                # 计算当前速度
-                if current_time - last_time >= 1.0:  # 每秒计算一次速度
+                # 计算当前速度：按两次状态更新的时间差计算，状态未刷新时不采样
+                if status_time - last_time >= 1.0:  # 每秒计算一次速度
                     if downloaded > last_downloaded:
-                        current_speed = (downloaded - last_downloaded) / (current_time - last_time)
+                        current_speed = (downloaded - last_downloaded) / (status_time - last_time)
                         if current_speed > 0:
                             speed_samples.append(current_speed)
                     last_downloaded = downloaded
-                    last_time = current_time
+                    last_time = status_time
+                    
+                    # 最近5个样本的变异系数低于5%且已下载超过1/4目标大小时，认为速度已稳定，提前结束
+                    if len(speed_samples) >= 5 and downloaded > test_size / 4:
+                        recent = list(speed_samples)[-5:]
+                        if statistics.pstdev(recent) / statistics.fmean(recent) < 0.05:
+                            logger.info(f"BT download speed converged after {elapsed:.1f}s")
+                            converged = True
+                            break
                 
                 # 如果下载了足够的数据或超时，停止
                 if downloaded >= test_size:
-                    logger.info(f"Downloaded sufficient data: {downloaded / 1024 / 1024:.2f} MB")
+                    logger.info(f"Downloaded sufficient data: {downloaded / _MB:.2f} MB")
                     break
                 
                 if timeout is not None and elapsed > timeout:
@@ -1170,41 +1459,36 @@ class Downloader:
                     logger.info("BT download completed")
                     break
                 
-                time.sleep(0.5)
-            
-            total_time = time.time() - download_start
-            avg_speed = downloaded / total_time if total_time > 0 and downloaded > 0 else 0
+                # 等待下一次state_update_alert
+                self._wait_for_bt_alert(1.0)
             
-            # 清理
-            ses.remove_torrent(handle)
-            
-            # 清理临时文件
-            try:
-                import shutil
-                if os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-            except:
-                pass
-            
-            # 测试延迟（不设置超时限制）
-            latency = self.test_bt_latency(torrent_path, timeout=None)
+            total_time = time.monotonic() - download_start
+            if converged:
+                # 与收敛判定使用同一组最近样本，去掉最大和最小样本后取平均（排除起步阶段的低速样本）
+                avg_speed = statistics.fmean(sorted(recent)[1:-1])
+            else:
+                avg_speed = downloaded / total_time if total_time > 0 and downloaded > 0 else 0
             
             return {
                 "speed": avg_speed,
                 "latency": latency,
                 "peers": peers,
                 "seeds": seeds,
-                "downloaded": downloaded
+                "downloaded": downloaded,
+                "converged": converged
             }
             
-        except ImportError:
-            logger.warning("libtorrent not available")
-            return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
         except Exception as e:
             logger.error(f"BT download speed test failed: {e}")
             import traceback
             traceback.print_exc()
             return {"speed": -1, "latency": -1, "peers": 0, "seeds": 0}
+        finally:
+            # 共享session不会随本次调用销毁，任何退出路径都必须移除torrent；
+            # 同时删除本torrent写入的文件和目录（多文件torrent的目录树），保留测速目录
+            if handle is not None:
+                self._remove_torrent(ses, handle, delete_files=True)
+            self._release_bt_test_slot(torrent_path)
     
     def download_bt(
         self,
@@ -1225,9 +1509,7 @@ class Downloader:
         """
         task_id = str(uuid.uuid4())
         
-        try:
-            import libtorrent as lt
-        except ImportError:
+        if not _HAS_LT:
             with self._lock:
                 self.download_tasks[task_id] = {
                     "status": "failed",
@@ -1249,32 +1531,25 @@ class Downloader:
         
         # 在后台线程中执行下载
         def _download():
+            handle = None
             try:
-                import libtorrent as lt
-                
-                # 创建优化的session
-                ses = self._create_optimized_session()
+                # 获取下载共享的session
+                ses = self._get_session()
                 
                 # 获取tracker列表
                 trackers = self._get_tracker_list()
                 
-                # 解析torrent或磁力链接（fetching阶段：获取magnet/torrent元数据）
-                if torrent_path.startswith('magnet:'):
-                    params = {
-                        'save_path': output_path,
-                        'storage_mode': lt.storage_mode_t(2),
-                    }
-                    handle = lt.add_magnet_uri(ses, torrent_path, params)
-                else:
-                    info = lt.torrent_info(torrent_path)
-                    handle = ses.add_torrent(info, output_path)
-                
-                # 添加tracker
-                self._add_trackers_to_handle(handle, trackers)
+                # 解析torrent或磁力链接（fetching阶段：获取magnet/torrent元数据），tracker随参数一并添加
+                handle = ses.add_torrent(self._build_torrent_params(torrent_path, output_path, trackers))
                 
                 # 等待元数据（fetching阶段）
+                wait = 0.02
                 while not handle.has_metadata():
-                    time.sleep(0.1)
+                    # 后端关闭时主动结束（磁力链接无效时元数据等待没有超时）
+                    if self._closing.is_set():
+                        raise RuntimeError("Backend is shutting down")
+                    self._wait_for_bt_alert(wait)
+                    wait = min(wait * 1.5, 0.5)
                 
                 # 获取元数据完成，切换到下载状态
                 with self._lock:
@@ -1289,12 +1564,15 @@ class Downloader:
                 
                 # 下载循环
                 while True:
-                    status = handle.status()
+                    status = self._get_torrent_status(handle)
+                    snap = {
+                        "progress": status.progress,
+                        "downloaded": status.total_download,
+                        "speed": status.download_rate
+                    }
                     
-                    with self._lock:
-                        self.download_tasks[task_id]["progress"] = status.progress
-                        self.download_tasks[task_id]["downloaded"] = status.total_download
-                        self.download_tasks[task_id]["speed"] = status.download_rate
+                    # 仅替换快照字典，不获取self._lock；终态时再一次性写回任务字典
+                    self._task_snapshot[task_id] = snap
                     
                     if progress_callback:
                         progress_callback(status.progress, status.total_download, total_size)
@@ -1302,28 +1580,52 @@ class Downloader:
                     # 检查是否完成
                     if status.state == lt.torrent_status.seeding or status.progress >= 1.0:
                         with self._lock:
+                            self.download_tasks[task_id].update(snap)
                             self.download_tasks[task_id]["status"] = "completed"
                             self.download_tasks[task_id]["progress"] = 1.0
                         break
                     
-                    # 检查是否失败
-                    if status.state == lt.torrent_status.downloading and status.paused:
+                    # 检查是否失败（被session自动管理排队而暂停的torrent稍后会自动恢复，不算失败）
+                    if (status.state == lt.torrent_status.downloading and status.paused
+                            and not handle.flags() & lt.torrent_flags.auto_managed):
                         with self._lock:
+                            self.download_tasks[task_id].update(snap)
                             self.download_tasks[task_id]["status"] = "failed"
                             self.download_tasks[task_id]["error"] = "Download paused"
                         break
                     
-                    time.sleep(0.5)
-                
-                ses.remove_torrent(handle)
+                    if self._closing.is_set():
+                        raise RuntimeError("Backend is shutting down")
+                    
+                    # 等待下一次state_update_alert
+                    self._wait_for_bt_alert(1.0)
                 
             except Exception as e:
                 with self._lock:
+                    self.download_tasks[task_id].update(self._task_snapshot.get(task_id, {}))
                     self.download_tasks[task_id]["status"] = "failed"
                     self.download_tasks[task_id]["error"] = str(e)
-        
-        thread = threading.Thread(target=_download, daemon=True)
-        thread.start()
+            finally:
+                # 共享session不会随任务结束销毁，失败时也要移除torrent，否则会继续下载写盘
+                if handle is not None:
+                    self._remove_torrent(ses, handle)
+                self._task_snapshot.pop(task_id, None)
+        
+        # 后端关闭后线程池不再接受任务，直接将任务标记为失败而不是抛出异常
+        if self._closing.is_set():
+            future = None
+        else:
+            try:
+                future = self._bt_executor.submit(_download)
+            except RuntimeError:
+                # 与close()并发时线程池可能已关闭
+                future = None
+        with self._lock:
+            if future is None:
+                self.download_tasks[task_id]["status"] = "failed"
+                self.download_tasks[task_id]["error"] = "Backend is shutting down"
+            else:
+                self.download_tasks[task_id]["future"] = future
         
         return task_id
 
@@ -4,27 +4,435 @@ Supports parsing image lists from multiple sources, scanning local cache, and id
 """
 import os
 import re
+import errno
 import subprocess
 import tempfile
 import json
 import uuid
 import hashlib
+import traceback
+import functools
 import shutil
 import threading
 import time
 import sys
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, NamedTuple
+from urllib.parse import parse_qs, urlparse
 from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
 from downloader import Downloader
 from iso_inspector import ISOInspector
 
+# requests/lxml在首次联网时才导入，list_available_versions、本地镜像等离线路径不承担其导入开销
+if TYPE_CHECKING:
+    import io
+    import requests
+    from lxml.etree import XPath
+    from lxml.html import HtmlElement
+
 
 logger = logging.getLogger('ISOHandler')
 
+# orjson为可选依赖（解析更快，且可直接解析bytes），未安装时使用标准库json
+# orjson.JSONDecodeError是json.JSONDecodeError（ValueError）的子类，异常处理无需区分
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path_str: str, mtime_ns: int) -> dict[str, Any]:
+    """
+    读取并解析产品版本ID配置文件，按(路径, 修改时间)缓存，文件未修改时各ISOHandler实例共用同一份结果
+    
+    Args:
+        path_str: 配置文件路径
+        mtime_ns: 配置文件修改时间（纳秒），仅用作缓存键
+    
+    Returns:
+        产品版本ID字典（只读使用，不要修改）
+    """
+    # 直接解析原始bytes：orjson无需先解码为str，标准库json.loads同样接受UTF-8 bytes
+    data = _json_loads(Path(path_str).read_bytes())
+    # 加载时一次性移除注释字段（以"_"开头的键，包括各OS配置内的），使用方无需再跳过
+    return {
+        os_key: ({k: v for k, v in os_config.items() if not k.startswith('_')}
+                 if isinstance(os_config, dict) else os_config)
+        for os_key, os_config in data.items()
+        if not os_key.startswith('_')
+    }
+
+
+# 操作系统类型识别：一次正则匹配代替多处 "windows11"/"win11"/"w11" 子串判断
+_OS_PATTERN = re.compile(r'w(?:in(?:dows)?)?(1[01])')
+_OS_CANON = {'10': 'Windows 10', '11': 'Windows 11'}
+
+# 下载URL中的文件名：查询参数之前的最后一段路径（以"/"结尾时不匹配）
+_FILENAME_RE = re.compile(r'(?:[^?]*/)?([^/?]+)(?=\?|$)')
+
+# 单元格文本中的magnet链接
+_MAGNET_RE = re.compile(r'magnet:[^\s\)]+')
+
+# MSDN镜像站表格中的文件大小（如"4.5 GB"、"850MB"），单位换算为字节
+_SIZE_RE = re.compile(r'\s*(\d*\.?\d+)\s*([GM])B\s*', re.IGNORECASE)
+_SIZE_UNITS: Mapping[str, int] = MappingProxyType({"G": 1024 * 1024 * 1024, "M": 1024 * 1024})
+
+# 标准格式ISO文件名: {大版本}{me/ce}_{版本号}_{主构建号}_{次构建号}_{语言}_{架构}（已去除.iso并转为小写）
+_ISO_FILENAME_RE = re.compile(r'^(win11|win10)(me|ce)_(\d{2}h\d)_(\d+)_(\d+)_([a-z]{2}(?:-[a-z]{2})?)_(x64|x86|arm64)$')
+# 标准格式文件名的必要条件，用于在解析前快速排除MSDN页面上大量无关的文件名（避免逐个抛出ValueError）
+_ISO_HINT_RE = re.compile(r'win1[01](?:me|ce)_', re.IGNORECASE)
+
+# 微软API下载选项的DownloadType与架构的对应关系
+_ARCH_MAP: Mapping[str, int] = MappingProxyType({"x86": 0, "x64": 1, "arm64": 2})
+_ARCH_REVERSE: Mapping[int, str] = MappingProxyType({0: "x86", 1: "x64", 2: "ARM64"})
+
+
+def _detect_os_key(os_type: str) -> str | None:
+    """
+    识别操作系统类型
+    
+    Args:
+        os_type: 操作系统类型字符串 (如 "Windows11"、"win10"、"w11")
+    
+    Returns:
+        "Windows 10" 或 "Windows 11"，无法识别时返回None
+    """
+    match = _OS_PATTERN.search(os_type.lower()) if os_type else None
+    return _OS_CANON[match.group(1)] if match else None
+
+
+def _new_session_id() -> str:
+    """
+    生成微软下载API使用的sessionId（随机UUID v4格式字符串）
+    
+    只需要字符串形式，直接格式化os.urandom的结果，不构造uuid.UUID对象
+    """
+    b = bytearray(os.urandom(16))
+    b[6] = (b[6] & 0x0F) | 0x40  # 版本号 4
+    b[8] = (b[8] & 0x3F) | 0x80  # RFC 4122 变体
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# 微软下载API配置（基于Fido）
+_MS_ORG_ID = "y6jn8c31"
+_MS_PROFILE_ID = "606624d44113"
+
+# 请求超时均为(连接, 读取)二元组（秒）：主机不可达时只消耗连接超时，而不是整个读取超时
+# 连接超时略大于3秒（TCP SYN重传间隔），参考requests文档的建议值
+_CONNECT_TIMEOUT = 3.05
+_MS_API_TIMEOUT = (_CONNECT_TIMEOUT, 30)
+# sessionId白名单请求的超时，响应被丢弃，不必等待完整的API超时
+_MS_TAGS_TIMEOUT = (_CONNECT_TIMEOUT, 5)
+# SKU信息（含已白名单的sessionId）的缓存有效期（秒），sessionId在数分钟内有效
+_MS_SKU_TTL = 300
+
+# MSDN镜像站页面解析结果的缓存有效期（秒）
+_MSDN_PAGE_TTL = 600
+# MSDN镜像站页面请求超时，候选URL中有不存在的页面或不可达的主机，连接阶段应尽快失败
+_MSDN_PAGE_TIMEOUT = (_CONNECT_TIMEOUT, 10)
+
+# MSDN镜像站页面流式下载时每次读取并送入解析器的字节数
+_MSDN_CHUNK_SIZE = 32 * 1024
+
+# MSDN镜像站页面解析使用的XPath表达式（经_xpath编译，节点遍历在lxml的C实现中完成）
+_XP_MAGNET_LINKS = "//a[starts-with(normalize-space(@href), 'magnet:')]"
+_XP_TABLES = "//table"
+_XP_ROWS = ".//tr"
+_XP_CELLS = ".//td | .//th"
+_XP_LINKS = ".//a[@href]"
+
+
+@functools.lru_cache(maxsize=None)
+def _xpath(expr: str) -> "XPath":
+    """编译XPath表达式（每个表达式只编译一次；首次使用时才导入lxml）"""
+    from lxml.etree import XPath
+    return XPath(expr)
+
+
+def _node_text(node: "HtmlElement") -> str:
+    """提取节点文本：各文本片段分别去除首尾空白后拼接"""
+    return "".join(text.strip() for text in node.itertext())
+
+
+# 下载页面URL（请求API时作为Referer）
+_MS_REFERER_URLS = {
+    "Windows 10": "https://www.microsoft.com/software-download/windows10",
+    "Windows 11": "https://www.microsoft.com/software-download/windows11",
+}
+
+# 所有HTTP请求共用的请求头（设置在共享Session上）
+_BASE_HEADERS: Mapping[str, str] = MappingProxyType({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+})
+
+
+@functools.lru_cache(maxsize=64)
+def _ms_api_headers(referer_url: str, language: str) -> Mapping[str, str]:
+    """
+    微软下载API的附加请求头（必须带Referer，否则微软服务器可能拒绝请求）
+    
+    组合数很少（下载页面 × 语言），按参数缓存，返回只读映射
+    """
+    return MappingProxyType({
+        "Referer": referer_url,
+        "Accept-Language": f"{language},en-US;q=0.9",
+        "Origin": "https://www.microsoft.com",
+    })
+
+
+# 语言代码映射（微软API返回的语言名称 -> 标准语言代码）
+_API_NAME_TO_CODE: Mapping[str, str] = MappingProxyType({
+    "chinese (simplified)": "zh-CN",
+    "chinese (traditional)": "zh-TW",
+    "english": "en-US",
+    "english international": "en-US",
+    "french": "fr-FR",
+    "french canadian": "fr-CA",
+    "german": "de-DE",
+    "japanese": "ja-JP",
+    "korean": "ko-KR",
+    "spanish": "es-ES",
+    "spanish (mexico)": "es-MX",
+    "portuguese": "pt-PT",
+    "brazilian portuguese": "pt-BR",
+    "russian": "ru-RU",
+    "italian": "it-IT",
+    "dutch": "nl-NL",
+    "polish": "pl-PL",
+    "turkish": "tr-TR",
+    "arabic": "ar-SA",
+    "danish": "da-DK",
+    "swedish": "sv-SE",
+    "norwegian": "nb-NO",
+    "finnish": "fi-FI",
+    "czech": "cs-CZ",
+    "hungarian": "hu-HU",
+    "romanian": "ro-RO",
+    "greek": "el-GR",
+    "hebrew": "he-IL",
+    "thai": "th-TH",
+    "ukrainian": "uk-UA",
+    "bulgarian": "bg-BG",
+    "croatian": "hr-HR",
+    "serbian latin": "sr-Latn-RS",
+    "slovak": "sk-SK",
+    "slovenian": "sl-SI",
+    "estonian": "et-EE",
+    "latvian": "lv-LV",
+    "lithuanian": "lt-LT",
+})
+
+# 反向映射（小写标准语言代码 -> API返回的语言名称），导入时构建一次
+_CODE_TO_API_NAME: Mapping[str, tuple[str, ...]] = MappingProxyType({
+    code.lower(): tuple(name for name, c in _API_NAME_TO_CODE.items() if c == code)
+    for code in dict.fromkeys(_API_NAME_TO_CODE.values())
+})
+
+
+class _MagnetInfo(NamedTuple):
+    """magnet链接中的文件信息"""
+    filename: str
+    size: int
+    hash: str
+
+
+@dataclass(slots=True)
+class _ImageRow:
+    """
+    MSDN镜像站表格中逐行累积的镜像信息
+    
+    整个表格复用同一个实例，换表、文件名无效或取得magnet链接后调用reset()清空
+    """
+    name: str = ""
+    arch: str = ""
+    language: str = ""
+    version: str = ""
+    build: str = ""
+    edition: str = ""
+    size: int | None = None
+    checksum: str | None = None
+    
+    def reset(self) -> None:
+        self.__init__()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_magnet(magnet_link: str) -> _MagnetInfo:
+    """
+    从magnet链接解析文件名(dn)、文件大小(xl)和BT哈希(xt)，同一链接只解析一次
+    
+    Args:
+        magnet_link: magnet链接
+    
+    Returns:
+        _MagnetInfo，无法解析的字段为空字符串或0
+    """
+    try:
+        params = parse_qs(urlparse(magnet_link).query)
+    except Exception:
+        return _MagnetInfo("", 0, "")
+    
+    filename = params.get('dn', [''])[0]
+    try:
+        size = int(params.get('xl', ['0'])[0])
+    except ValueError:
+        size = 0
+    btih = params.get('xt', [''])[0].replace('urn:btih:', '')
+    return _MagnetInfo(filename, size, btih)
+
+
+@functools.lru_cache(maxsize=2048)
+def _parse_iso_filename_cached(filename: str) -> Mapping[str, str]:
+    """
+    解析标准格式的ISO文件名（见ISOHandler._parse_iso_filename），结果按文件名缓存，只读使用
+    
+    Raises:
+        ValueError: 如果文件名不符合标准格式（异常不会被缓存）
+    """
+    # 移除路径，只保留文件名
+    filename = os.path.basename(filename)
+    
+    # 移除 .iso 扩展名
+    if filename.lower().endswith('.iso'):
+        filename = filename[:-4]
+    
+    # 正则表达式匹配格式: win11me_25h2_26200_6584_zh-cn_x64
+    match = _ISO_FILENAME_RE.match(filename.lower())
+    
+    if not match:
+        raise ValueError(
+            f"文件名不符合标准格式: {filename}\n"
+            f"期望格式: {{大版本}}{{me/ce}}_{{版本号}}_{{主构建号}}_{{次构建号}}_{{语言}}_{{架构}}.iso\n"
+            f"示例: win11me_25h2_26200_6584_zh-cn_x64.iso"
+        )
+    
+    os_prefix = match.group(1)
+    source_type = match.group(2)
+    version = match.group(3).upper()
+    build_major = match.group(4)
+    build_minor = match.group(5)
+    language = match.group(6).lower()
+    arch = match.group(7).lower()
+    
+    # 确定操作系统类型
+    if os_prefix == "win11":
+        os_type = "Windows11"
+    elif os_prefix == "win10":
+        os_type = "Windows10"
+    else:
+        raise ValueError(f"Unsupported OS prefix: {os_prefix}")
+    
+    return MappingProxyType({
+        "os_type": os_type,
+        "source_type": source_type,
+        "version": version,
+        "build_major": build_major,
+        "build_minor": build_minor,
+        "build": f"{build_major}.{build_minor}",
+        "language": language,
+        "arch": arch
+    })
+
+
+# ISO文件SHA256缓存的边车文件（位于缓存目录中，_cleanup_non_iso_files不会删除）
+_ISO_INDEX_FILENAME = ".iso_index.json"
+
+# 导入ISO时单次系统调用复制的最大字节数
+_COPY_CHUNK = 1 << 30
+# 用户态复制的缓冲区大小（与ZFS/NFS等常见块大小一致，比shutil默认的64KiB/1MiB系统调用次数少得多）
+_COPY_BUFSIZE = 4 * 1024 * 1024
+# copy_file_range/sendfile不适用于当前文件（跨文件系统、内核不支持、文件类型不支持等）时的错误码
+_KERNEL_COPY_UNSUPPORTED = frozenset(
+    code for code in (
+        errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP,
+        getattr(errno, "ENOTSUP", None), errno.ETXTBSY, errno.EBADF,
+    ) if code is not None
+)
+
+
+def _copy_fd_in_kernel(src_fd: int, dst_fd: int) -> bool:
+    """
+    在内核中从src_fd的当前位置复制到dst_fd，数据不经过用户态（Linux）
+    
+    优先使用copy_file_range（同一文件系统上可直接reflink），不可用时使用sendfile。
+    两者都使用并推进文件当前位置，中途切换或退回用户态复制时从已复制的位置继续
+    
+    Returns:
+        是否已复制到文件末尾；返回False时调用方需从当前位置继续用其他方式复制
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK):
+                pass
+            return True
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+            logger.debug(f"copy_file_range unavailable ({e}), falling back to sendfile")
+    
+    try:
+        while os.sendfile(dst_fd, src_fd, None, _COPY_CHUNK):
+            pass
+        return True
+    except OSError as e:
+        if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+            raise
+        logger.debug(f"sendfile unavailable ({e}), falling back to userspace copy")
+    return False
+
+
+def _copy_fileobj_readinto(fsrc: "io.RawIOBase", fdst: "io.RawIOBase") -> None:
+    """用户态复制：读入预分配的缓冲区（readinto），避免每块数据都分配新的bytes对象"""
+    buf = bytearray(_COPY_BUFSIZE)
+    mv = memoryview(buf)
+    while n := fsrc.readinto(buf):
+        # 无缓冲的文件对象可能只写入部分数据，写完为止
+        view = mv[:n]
+        while view:
+            view = view[fdst.write(view):]
+
+
+def _copy_file_windows(src: Path, dst: Path) -> None:
+    """使用CopyFileExW复制文件（Windows），由系统完成复制并保留属性和时间戳"""
+    import ctypes
+    from ctypes import wintypes
+    
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    copy_file_ex = kernel32.CopyFileExW
+    copy_file_ex.argtypes = [
+        wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_void_p, ctypes.c_void_p,
+        ctypes.POINTER(wintypes.BOOL), wintypes.DWORD,
+    ]
+    copy_file_ex.restype = wintypes.BOOL
+    if not copy_file_ex(str(src), str(dst), None, None, None, 0):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """
+    复制ISO文件并保留元数据（同shutil.copy2），尽量避免数据在内核与用户态之间来回拷贝
+    
+    Windows使用CopyFileExW；Linux使用copy_file_range/sendfile；其他情况退回用户态复制
+    """
+    if sys.platform == "win32":
+        _copy_file_windows(src, dst)
+        return
+    
+    with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+        if not _copy_fd_in_kernel(fsrc.fileno(), fdst.fileno()):
+            _copy_fileobj_readinto(fsrc, fdst)
+    shutil.copystat(src, dst)
+
 
 class ISOHandler:
     """ISO镜像处理器"""
@@ -38,12 +446,58 @@ class ISOHandler:
         """
         self.cache_dir: Path = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # 缓存目录的真实路径只解析一次（目录已创建），避免每次扫描都realpath
+        self._cache_dir_real: str = os.path.realpath(self.cache_dir)
         self.downloader: Downloader = Downloader()
         self.product_edition_ids: dict[str, Any] = self._load_product_edition_ids()
+        # 版本号索引：{os_key: {版本号大写: 配置中的原始版本键}}，同名时保留先出现的
+        self._version_index: dict[str, dict[str, str]] = {}
+        for os_key, os_config in self.product_edition_ids.items():
+            index = self._version_index[os_key] = {}
+            for key in os_config:
+                index.setdefault(key.upper(), key)
+        # 产品版本ID索引：{(os_key, 版本键): [productEditionId, ...]}，加载时校验一次
+        self._edition_index: dict[tuple[str, str], list[int]] = self._build_edition_index()
+        # 可用版本列表（已过滤失效版本）
+        self._available_versions: dict[str, dict[str, dict[str, str]]] = self._build_available_versions()
+        # 所有HTTP请求共用一个Session（首次联网时创建，见_http属性）
+        self._http_session: "requests.Session | None" = None
+        self._http_lock: threading.Lock = threading.Lock()
+        # MSDN镜像站页面缓存：{url: (获取时间(monotonic), 解析后的页面，不含magnet链接的页面为None)}
+        self._page_cache: dict[str, tuple[float, "HtmlElement | None"]] = {}
+        # 微软SKU信息缓存：{(os_key, 版本号, 语言): (获取时间(monotonic), sku_data, session_ids)}
+        self._sku_cache: dict[tuple[str, str, str], tuple[float, dict[str, dict[str, Any]], list[str]]] = {}
+        # ISO文件SHA256缓存：{绝对路径: {size, mtime_ns, sha256}}，首次使用时从边车文件加载
+        self._iso_index_path: Path = self.cache_dir / _ISO_INDEX_FILENAME
+        self._iso_index: dict[str, dict[str, Any]] | None = None
+        self._iso_index_lock: threading.Lock = threading.Lock()
         # 测试任务管理
+        # 单键读写（插入完整构建的任务、读取cancelled等）在CPython下是原子的，不加锁；
+        # _test_lock只保护"读取后修改"（检查取消后改状态、中止任务、写入结果）。
+        # 写入结果时先写result/error再写status，无锁读取到终态status时结果字段一定已就绪
         self.test_tasks: dict[str, dict[str, Any]] = {}
         self._test_lock: threading.Lock = threading.Lock()
     
+    @property
+    def _http(self) -> "requests.Session":
+        """共享HTTP Session，复用连接池（避免每次请求重新建立TCP/TLS连接），首次访问时创建"""
+        if self._http_session is None:
+            with self._http_lock:
+                if self._http_session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+                    session = requests.Session()
+                    # 连接错误和5xx响应自动重试（指数退避）；重试用尽后返回最后的响应，由调用方raise_for_status处理
+                    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                                  raise_on_status=False)
+                    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(_BASE_HEADERS)
+                    self._http_session = session
+        return self._http_session
+    
     def _load_product_edition_ids(self) -> dict[str, Any]:
         """
         从配置文件加载产品版本ID映射
@@ -57,19 +511,15 @@ class ISOHandler:
         """
         config_path = Path(__file__).parent.parent.parent / "data" / "product_edition_ids.json"
         
-        if not config_path.exists():
+        try:
+            mtime_ns = config_path.stat().st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"Product ID config file not found: {config_path}\nPlease ensure data/product_edition_ids.json file exists"
             )
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # 移除注释字段
-                data.pop('_note', None)
-                data.pop('_how_to_add_more', None)
-                data.pop('_source', None)
-                return data
+            return _load_config_cached(str(config_path), mtime_ns)
         except json.JSONDecodeError as e:
             raise ValueError(f"Product ID config file format error: {e}")
         except Exception as e:
@@ -97,11 +547,8 @@ class ISOHandler:
             raise ValueError("Product ID config not loaded, unable to get product edition IDs")
         
         # 确定操作系统键
-        if "windows11" in os_type or "win11" in os_type or "w11" in os_type:
-            os_key = "Windows 11"
-        elif "windows10" in os_type or "win10" in os_type or "w10" in os_type:
-            os_key = "Windows 10"
-        else:
+        os_key = _detect_os_key(os_type)
+        if os_key is None:
             raise ValueError(f"Unsupported OS type: {os_type}")
         
         # 检查操作系统是否存在
@@ -123,10 +570,7 @@ class ISOHandler:
                 logger.info(f"No version specified, using default version: {version_key}")
         else:
             # 尝试精确匹配
-            for key in os_config.keys():
-                if key.upper() == version_lower:
-                    version_key = key
-                    break
+            version_key = self._version_index[os_key].get(version_lower)
             
             # 如果精确匹配失败，尝试部分匹配
             if not version_key:
@@ -141,31 +585,38 @@ class ISOHandler:
                 f"Version '{version}' for {os_key} not found in config file. Available versions: {available_versions}"
             )
         
-        version_config = os_config[version_key]
-        
-        # 只支持 Multi Editions
-        if "Multi Editions" not in version_config:
+        product_ids = self._edition_index.get((os_key, version_key))
+        if product_ids is None:
             raise ValueError(
-                f"Multi Editions configuration for {os_key} {version_key} not found in config file."
+                f"Multi Editions configuration for {os_key} {version_key} not found or invalid in config file."
             )
+        return product_ids
+    
+    def _build_edition_index(self) -> dict[tuple[str, str], list[int]]:
+        """
+        校验配置并构建产品版本ID索引（仅支持 Multi Editions），格式错误的条目记录日志后跳过
         
-        multi_editions = version_config["Multi Editions"]
-        if "ids" not in multi_editions:
-            raise ValueError(
-                f"Multi Editions for {os_key} {version_key} is missing 'ids' field in config file."
-            )
+        Returns:
+            {(os_key, version_key): [productEditionId, ...]}
+        """
+        index = {}
         
-        product_ids = multi_editions["ids"]
+        for os_key, os_config in self.product_edition_ids.items():
+            for version_key, version_config in os_config.items():
+                multi_editions = version_config.get("Multi Editions") if isinstance(version_config, dict) else None
+                product_ids = multi_editions.get("ids") if isinstance(multi_editions, dict) else None
+                
+                # 确保索引中的值是列表
+                if isinstance(product_ids, list):
+                    index[(os_key, version_key)] = product_ids
+                elif isinstance(product_ids, int):
+                    index[(os_key, version_key)] = [product_ids]
+                else:
+                    logger.warning(
+                        f"Invalid Multi Editions config, skipped: {os_key}/{version_key}/Multi Editions/ids = {product_ids}"
+                    )
         
-        # 确保返回的是列表
-        if isinstance(product_ids, list):
-            return product_ids
-        elif isinstance(product_ids, int):
-            return [product_ids]
-        else:
-            raise ValueError(
-                f"Product ID format error in config file: {os_key}/{version_key}/Multi Editions/ids = {product_ids}"
-            )
+        return index
     
     def list_sources(self) -> list[str]:
         """获取可用的镜像源列表"""
@@ -192,26 +643,34 @@ class ISOHandler:
             }
             如果指定了 os_type，则只返回该OS的版本列表
         """
-        if not self.product_edition_ids:
-            return {}
+        if not os_type:
+            return dict(self._available_versions)
         
         result = {}
+        os_type_lower = os_type.lower().replace(" ", "")
+        
+        for os_key, versions in self._available_versions.items():
+            # 只处理匹配的OS
+            os_key_lower = os_key.lower().replace(" ", "")
+            if os_key_lower not in os_type_lower and os_type_lower not in os_key_lower:
+                continue
+            result[os_key] = versions
+        
+        return result
+    
+    def _build_available_versions(self) -> dict[str, dict[str, dict[str, str]]]:
+        """
+        从配置构建可用版本列表（配置运行期间不变，初始化时构建一次，供list_available_versions使用）
+        
+        Returns:
+            {os_key: {version_key: {"description": str, "build": str}}}，不含已失效版本和没有可用版本的OS
+        """
+        result = {}
         
         for os_key, os_config in self.product_edition_ids.items():
-            # 如果指定了 os_type，只处理匹配的OS
-            if os_type:
-                os_key_lower = os_key.lower().replace(" ", "")
-                os_type_lower = os_type.lower().replace(" ", "")
-                if os_key_lower not in os_type_lower and os_type_lower not in os_key_lower:
-                    continue
-            
             # 提取所有版本信息（包含description和build）
             versions = {}
             for version_key, version_config in os_config.items():
-                # 跳过注释字段
-                if version_key.startswith('_'):
-                    continue
-                
                 # 获取description字段
                 description = version_config.get("description", version_key)
                 
@@ -255,6 +714,158 @@ class ISOHandler:
         else:
             raise ValueError(f"Unknown image source: {source}")
     
+    def _fetch_sku_for_edition(self, idx: int, edition_id: Any, session_id: str, language: str,
+                               referer_url: str, timeout: float | tuple[float, float]) -> tuple[int, dict[str, Any] | None]:
+        """
+        为单个productEditionId白名单sessionId并获取SKU信息（可在线程池中并发调用）
+        
+        Args:
+            idx: productEditionId序号（对应session_ids中的下标）
+            edition_id: productEditionId
+            session_id: 该productEditionId使用的sessionId
+            language: 请求使用的语言
+            referer_url: Referer请求头
+            timeout: 请求超时时间（秒，或(连接, 读取)二元组）
+        
+        Returns:
+            (idx, SKU信息)，失败时SKU信息为None
+        """
+        import requests
+        
+        # 步骤1: 白名单sessionId
+        # 响应内容不使用，只需请求到达服务器：使用短超时，失败时仍继续尝试获取SKU信息
+        tags_url = f"https://vlscppe.microsoft.com/tags?org_id={_MS_ORG_ID}&session_id={session_id}"
+        try:
+            self._http.get(tags_url, timeout=_MS_TAGS_TIMEOUT, allow_redirects=False)
+            # 不检查状态码，因为可能返回重定向
+        except requests.RequestException as e:
+            logger.warning(f"Failed to whitelist sessionId, trying SKU query anyway: {e}")
+        
+        # 步骤2: 获取SKU信息（语言列表）
+        sku_url = (
+            f"https://www.microsoft.com/software-download-connector/api/getskuinformationbyproductedition"
+            f"?profile={_MS_PROFILE_ID}"
+            f"&productEditionId={edition_id}"
+            f"&SKU=undefined"
+            f"&friendlyFileName=undefined"
+            f"&Locale={language}"
+            f"&sessionID={session_id}"
+        )
+        
+        try:
+            # 添加必要的请求头（User-Agent/Accept已在共享Session上设置）
+            headers = _ms_api_headers(referer_url, language)
+            response = self._http.get(sku_url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            
+            # 解析JSON（即使Content-Type不是application/json，也可能是text/plain但内容是JSON），只解析一次
+            try:
+                sku_info = _json_loads(response.content)
+            except ValueError as e:
+                # 解析失败时根据Content-Type区分HTML响应和无效JSON
+                content_type = response.headers.get('Content-Type', '').lower()
+                logger.debug(f"Response content first 500 chars: {response.text[:500]}")
+                if 'html' in content_type:
+                    logger.warning(f"API returned HTML format (Content-Type: {content_type}, Status: {response.status_code})")
+                    raise ValueError(f"API returned HTML format: {content_type}")
+                logger.error(f"JSON parsing failed (Content-Type: {content_type}): {e}")
+                raise ValueError(f"Failed to parse JSON response: {e}")
+            
+            if sku_info.get("Errors"):
+                error_msg = sku_info["Errors"][0].get("Value", "Unknown error")
+                raise ValueError(f"Failed to get SKU information: {error_msg}")
+            
+            return idx, sku_info
+        
+        # 只捕获网络错误和响应内容错误（JSON结构不符合预期时会引发AttributeError/IndexError/KeyError/TypeError），
+        # 单个productEditionId失败不应中断整个列表查询；其余异常属于程序错误，不应吞掉
+        except (requests.RequestException, ValueError, AttributeError, IndexError, KeyError, TypeError) as e:
+            logger.error(f"Failed to get SKU info (edition_id={edition_id}): {e}")
+            return idx, None
+    
+    def _query_microsoft_skus(self, os_type: str, version: str,
+                              language: str) -> tuple[dict[str, dict[str, Any]], list[str]]:
+        """
+        获取微软官网指定系统版本的SKU信息（_list_microsoft_images和_fetch_microsoft_url共用）
+        
+        为每个productEditionId生成sessionId，并发完成白名单和SKU查询，按productEditionId顺序合并结果。
+        结果缓存_MS_SKU_TTL秒（列表和精确获取、不同架构的多次获取共用），下载链接请求失败时
+        由调用方通过_invalidate_microsoft_skus丢弃
+        
+        Args:
+            os_type: 操作系统类型 (如 "windows11")
+            version: 版本号 (如 "25h2")
+            language: 请求使用的语言
+        
+        Returns:
+            (sku_data, session_ids)
+            sku_data: {language: {DisplayName: str, Data: [(SessionIndex, SkuId)]}}
+            session_ids: 各productEditionId对应的sessionId，SessionIndex即其下标
+        
+        Raises:
+            ValueError: 不支持的操作系统类型，或未获取到任何SKU信息
+        """
+        os_key = _detect_os_key(os_type)
+        if os_key is None:
+            raise ValueError(f"Unsupported OS type: {os_type}")
+        referer_url = _MS_REFERER_URLS[os_key]
+        
+        cache_key = (os_key, version.lower(), language)
+        cached = self._sku_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < _MS_SKU_TTL:
+            return cached[1], cached[2]
+        
+        # 从配置文件获取产品版本ID（仅支持 Multi Editions）
+        product_edition_ids = self._get_product_edition_ids_from_config(os_type, version)
+        
+        # 各productEditionId的白名单和SKU请求互不依赖，并发发出
+        session_ids = [_new_session_id() for _ in product_edition_ids]
+        sku_results: list[dict[str, Any] | None] = [None] * len(product_edition_ids)
+        with ThreadPoolExecutor(max_workers=min(8, len(product_edition_ids)) or 1) as executor:
+            futures = [
+                executor.submit(self._fetch_sku_for_edition, idx, edition_id, session_ids[idx],
+                                language, referer_url, _MS_API_TIMEOUT)
+                for idx, edition_id in enumerate(product_edition_ids)
+            ]
+            for future in as_completed(futures):
+                idx, sku_info = future.result()
+                sku_results[idx] = sku_info
+        
+        # 按productEditionId顺序合并，保证结果顺序与串行请求时一致
+        sku_data: dict[str, dict[str, Any]] = {}
+        for idx, sku_info in enumerate(sku_results):
+            if not sku_info:
+                continue
+            
+            # 解析SKU信息
+            for sku in sku_info.get("Skus", []):
+                lang = sku.get("Language", "")
+                sku_id = sku.get("Id", "")
+                if not sku_id:
+                    continue
+                # 每个SKU只查找一次；显示名称取该语言第一次出现时的值，之后不再重复赋值
+                entry = sku_data.get(lang)
+                if entry is None:
+                    entry = sku_data[lang] = {"DisplayName": sku.get("LocalizedLanguage", lang), "Data": []}
+                entry["Data"].append((idx, sku_id))
+            
+            # 调试信息：打印获取到的语言和SKU数量
+            if sku_info.get("Skus"):
+                logger.info(f"Successfully retrieved {len(sku_info.get('Skus', []))} SKUs")
+                for sku in sku_info.get("Skus", [])[:3]:  # 只打印前3个
+                    logger.debug(f"  - Language: {sku.get('Language', 'N/A')}, SKU ID: {sku.get('Id', 'N/A')}")
+        
+        # 如果没有获取到SKU信息，抛出异常
+        if not sku_data:
+            raise ValueError("Failed to get SKU information, please check network connection or try again later")
+        
+        self._sku_cache[cache_key] = (time.monotonic(), sku_data, session_ids)
+        return sku_data, session_ids
+    
+    def _invalidate_microsoft_skus(self, os_type: str, version: str, language: str) -> None:
+        """丢弃_query_microsoft_skus缓存的SKU信息（sessionId可能已失效，下次调用重新获取）"""
+        self._sku_cache.pop((_detect_os_key(os_type), version.lower(), language), None)
+    
     def _list_microsoft_images(self, filter_options: dict[str, str] | None) -> list[dict[str, Any]]:
         """
         从微软官网获取镜像列表（基于Fido方案）
@@ -273,6 +884,8 @@ class ISOHandler:
                 - version: 版本号（如25H2, 22H2）
                 - edition: 版本类型（如Home/Pro/Edu）
         """
+        import requests
+        
         images = []
         
         # 根据过滤选项确定要访问的页面
@@ -285,221 +898,52 @@ class ISOHandler:
         edition = filter_options.get("edition", "").lower() if filter_options else ""
         
         # 如果没有指定OS类型，直接抛异常
-        if not os_type or ("windows10" not in os_type and "win10" not in os_type and "w10" not in os_type and 
-                          "windows11" not in os_type and "win11" not in os_type and "w11" not in os_type):
+        os_key = _detect_os_key(os_type)
+        if os_key is None:
             raise ValueError("OS type (Windows10 or Windows11) must be specified to get image list from Microsoft website")
         
         try:
-            # 确定下载页面URL
-            if "windows11" in os_type or "win11" in os_type or "w11" in os_type:
-                download_page_url = "https://www.microsoft.com/software-download/windows11"
-                referer_url = "https://www.microsoft.com/software-download/windows11"
-            elif "windows10" in os_type or "win10" in os_type or "w10" in os_type:
-                download_page_url = "https://www.microsoft.com/software-download/windows10"
-                referer_url = "https://www.microsoft.com/software-download/windows10"
-            else:
-                raise ValueError(f"Unsupported OS type: {os_type}")
-            
-            # 从配置文件获取产品版本ID（仅支持 Multi Editions）
-            product_edition_ids = self._get_product_edition_ids_from_config(os_type, version)
-            
-            # 微软API配置（基于Fido）
-            org_id = "y6jn8c31"
-            profile_id = "606624d44113"
-            timeout = 30
-            
-            # 为每个productEditionId生成sessionId并获取SKU信息
-            session_ids = []
-            sku_data = {}  # {language: {DisplayName: str, Data: [{SessionIndex: int, SkuId: str}]}}
-            
-            for idx, edition_id in enumerate(product_edition_ids):
-                # 生成sessionId
-                session_id = str(uuid.uuid4())
-                session_ids.append(session_id)
-                
-                # 步骤1: 白名单sessionId
-                tags_url = f"https://vlscppe.microsoft.com/tags?org_id={org_id}&session_id={session_id}"
-                try:
-                    response = requests.get(tags_url, timeout=timeout, allow_redirects=False)
-                    # 不检查状态码，因为可能返回重定向
-                except Exception as e:
-                    logger.error(f"Failed to whitelist sessionId: {e}")
-                    continue
-                
-                # 步骤2: 获取SKU信息（语言列表）
-                sku_url = (
-                    f"https://www.microsoft.com/software-download-connector/api/getskuinformationbyproductedition"
-                    f"?profile={profile_id}"
-                    f"&productEditionId={edition_id}"
-                    f"&SKU=undefined"
-                    f"&friendlyFileName=undefined"
-                    f"&Locale={language}"
-                    f"&sessionID={session_id}"
-                )
-                
-                try:
-                    # 使用Session保持cookie，并添加必要的请求头
-                    session = requests.Session()
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                        "Accept": "application/json, text/plain, */*",
-                        "Accept-Language": f"{language},en-US;q=0.9",
-                        "Referer": referer_url,
-                        "Origin": "https://www.microsoft.com"
-                    }
-                    response = session.get(sku_url, headers=headers, timeout=timeout)
-                    response.raise_for_status()
-                    
-                    # 尝试解析JSON（即使Content-Type不是application/json）
-                    try:
-                        sku_info = response.json()
-                    except ValueError:
-                        # 如果解析失败，检查是否是HTML响应
-                        content_type = response.headers.get('Content-Type', '').lower()
-                        if 'html' in content_type:
-                            logger.warning(f"API returned HTML format (Content-Type: {content_type}, Status: {response.status_code})")
-                            logger.debug(f"Response content first 500 chars: {response.text[:500]}")
-                            raise Exception(f"API returned HTML format: {content_type}")
-                        else:
-                            # 尝试解析为JSON（可能是text/plain但内容是JSON）
-                            logger.warning(f"Content-Type is {content_type}, attempting to parse as JSON")
-                            try:
-                                sku_info = response.json()
-                            except ValueError as e:
-                                logger.error(f"JSON parsing failed: {e}")
-                                logger.debug(f"Response content first 500 chars: {response.text[:500]}")
-                                raise Exception(f"Failed to parse JSON response: {e}")
-                    
-                    if sku_info.get("Errors"):
-                        error_msg = sku_info["Errors"][0].get("Value", "Unknown error")
-                        raise Exception(f"Failed to get SKU information: {error_msg}")
-                    
-                    # 解析SKU信息
-                    for sku in sku_info.get("Skus", []):
-                        lang = sku.get("Language", "")
-                        sku_id = sku.get("Id", "")
-                        if not sku_id:
-                            continue
-                        if lang not in sku_data:
-                            sku_data[lang] = {
-                                "DisplayName": sku.get("LocalizedLanguage", lang),
-                                "Data": []
-                            }
-                        sku_data[lang]["Data"].append({
-                            "SessionIndex": idx,
-                            "SkuId": sku_id
-                        })
-                    
-                    # 调试信息：打印获取到的语言和SKU数量
-                    if sku_info.get("Skus"):
-                        logger.info(f"Successfully retrieved {len(sku_info.get('Skus', []))} SKUs")
-                        for sku in sku_info.get("Skus", [])[:3]:  # 只打印前3个
-                            logger.debug(f"  - Language: {sku.get('Language', 'N/A')}, SKU ID: {sku.get('Id', 'N/A')}")
-                
-                except Exception as e:
-                    logger.error(f"Failed to get SKU info (edition_id={edition_id}): {e}")
-                    continue
-            
-            # 如果没有获取到SKU信息，抛出异常
-            if not sku_data:
-                raise ValueError("Failed to get SKU information, please check network connection or try again later")
+            # 步骤1-2: 白名单sessionId并获取SKU信息
+            sku_data, session_ids = self._query_microsoft_skus(os_type, version, language)
+            referer_url = _MS_REFERER_URLS[os_key]
             
             # 步骤3: 获取下载链接
             # 打印所有可用的语言
             logger.info(f"Available languages: {list(sku_data.keys())}")
             
-            # 语言代码映射（API返回的语言名称 -> 标准语言代码）
-            api_name_to_code = {
-                "chinese (simplified)": "zh-CN",
-                "chinese (traditional)": "zh-TW",
-                "english": "en-US",
-                "english international": "en-US",
-                "french": "fr-FR",
-                "french canadian": "fr-CA",
-                "german": "de-DE",
-                "japanese": "ja-JP",
-                "korean": "ko-KR",
-                "spanish": "es-ES",
-                "spanish (mexico)": "es-MX",
-                "portuguese": "pt-PT",
-                "brazilian portuguese": "pt-BR",
-                "russian": "ru-RU",
-                "italian": "it-IT",
-                "dutch": "nl-NL",
-                "polish": "pl-PL",
-                "turkish": "tr-TR",
-                "arabic": "ar-SA",
-                "danish": "da-DK",
-                "swedish": "sv-SE",
-                "norwegian": "nb-NO",
-                "finnish": "fi-FI",
-                "czech": "cs-CZ",
-                "hungarian": "hu-HU",
-                "romanian": "ro-RO",
-                "greek": "el-GR",
-                "hebrew": "he-IL",
-                "thai": "th-TH",
-                "ukrainian": "uk-UA",
-                "bulgarian": "bg-BG",
-                "croatian": "hr-HR",
-                "serbian latin": "sr-Latn-RS",
-                "slovak": "sk-SK",
-                "slovenian": "sl-SI",
-                "estonian": "et-EE",
-                "latvian": "lv-LV",
-                "lithuanian": "lt-LT"
-            }
-            
-            # 创建反向映射（标准语言代码 -> API返回的语言名称）
-            code_to_api_name = {}
-            for api_name, code in api_name_to_code.items():
-                if code not in code_to_api_name:
-                    code_to_api_name[code] = []
-                code_to_api_name[code].append(api_name)
-            
             # 优先使用指定的语言，如果没有则使用第一个可用语言
-            target_language = None
             language_lower = language.lower()
             
+            # 小写语言名称 -> API返回的原始名称（同名时保留先出现的）
+            lower_to_orig: dict[str, str] = {}
+            for lang in sku_data:
+                lower_to_orig.setdefault(lang.lower(), lang)
+            
             # 首先尝试直接匹配（用户输入的语言代码或名称与API返回的名称完全匹配）
-            for lang in sku_data.keys():
-                if lang.lower() == language_lower:
-                    target_language = lang
-                    break
+            target_language = lower_to_orig.get(language_lower)
             
             # 如果直接匹配失败，尝试通过语言代码映射匹配
             if not target_language:
-                # 如果用户输入的是标准语言代码（如zh-CN），查找对应的API语言名称
-                if language_lower in code_to_api_name:
-                    for api_name in code_to_api_name[language_lower]:
-                        for lang in sku_data.keys():
-                            if lang.lower() == api_name.lower():
-                                target_language = lang
-                                break
-                        if target_language:
-                            break
+                # 如果用户输入的是标准语言代码（如zh-CN），直接使用；
+                # 如果是语言名称，先查找对应的标准代码
+                if language_lower in _CODE_TO_API_NAME:
+                    target_code = language_lower
                 else:
-                    # 如果用户输入的是语言名称，查找对应的标准代码，然后查找API语言名称
-                    target_code = api_name_to_code.get(language_lower)
-                    if target_code and target_code in code_to_api_name:
-                        for api_name in code_to_api_name[target_code]:
-                            for lang in sku_data.keys():
-                                if lang.lower() == api_name.lower():
-                                    target_language = lang
-                                    break
-                            if target_language:
-                                break
+                    target_code = _API_NAME_TO_CODE.get(language_lower, "").lower()
+                for api_name in _CODE_TO_API_NAME.get(target_code, ()):
+                    target_language = lower_to_orig.get(api_name)
+                    if target_language:
+                        break
             
             # 如果仍然找不到，尝试模糊匹配（包含关系）
             if not target_language:
-                for lang in sku_data.keys():
-                    lang_lower = lang.lower()
+                for lang_lower, lang in lower_to_orig.items():
                     # 检查用户输入是否包含在API语言名称中，或API语言名称是否包含在用户输入中
                     if language_lower in lang_lower or lang_lower in language_lower:
                         target_language = lang
                         break
                     # 检查API语言名称映射后的代码是否匹配
-                    mapped_code = api_name_to_code.get(lang_lower)
+                    mapped_code = _API_NAME_TO_CODE.get(lang_lower)
                     if mapped_code and mapped_code.lower() == language_lower:
                         target_language = lang
                         break
@@ -513,16 +957,14 @@ class ISOHandler:
             language_info = sku_data[target_language]
             logger.info(f"Using language: {target_language}, SKU count: {len(language_info['Data'])}")
             
-            for entry in language_info["Data"]:
-                session_idx = entry["SessionIndex"]
-                sku_id = entry["SkuId"]
+            for session_idx, sku_id in language_info["Data"]:
                 session_id = session_ids[session_idx]
                 
                 # 获取下载链接
                 # 注意：Locale应该使用用户指定的语言（query_locale），而不是从SKU返回的语言
                 download_url = (
                     f"https://www.microsoft.com/software-download-connector/api/GetProductDownloadLinksBySku"
-                    f"?profile={profile_id}"
+                    f"?profile={_MS_PROFILE_ID}"
                     f"&productEditionId=undefined"
                     f"&SKU={sku_id}"
                     f"&friendlyFileName=undefined"
@@ -532,18 +974,10 @@ class ISOHandler:
                 
                 try:
                     # 必须添加Referer头，否则微软服务器可能拒绝请求
-                    # 使用Session保持cookie
-                    session = requests.Session()
-                    headers = {
-                        "Referer": referer_url,
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                        "Accept": "application/json, text/plain, */*",
-                        "Accept-Language": f"{query_locale},en-US;q=0.9",
-                        "Origin": "https://www.microsoft.com"
-                    }
-                    response = session.get(download_url, headers=headers, timeout=timeout)
+                    headers = _ms_api_headers(referer_url, query_locale)
+                    response = self._http.get(download_url, headers=headers, timeout=_MS_API_TIMEOUT)
                     response.raise_for_status()
-                    download_info = response.json()
+                    download_info = _json_loads(response.content)
                     
                     if download_info.get("Errors"):
                         error = download_info["Errors"][0]
@@ -553,10 +987,10 @@ class ISOHandler:
                                 f"Your IP address has been banned by Microsoft or is in a sanctioned region. "
                                 f"Session ID: {session_id}"
                             )
-                            raise Exception(error_msg)
+                            raise ValueError(error_msg)
                         else:
                             error_msg = error.get("Value", "Unknown error")
-                            raise Exception(f"Failed to get download link: {error_msg}")
+                            raise ValueError(f"Failed to get download link: {error_msg}")
                     
                     # 解析下载选项
                     for option in download_info.get("ProductDownloadOptions", []):
@@ -567,17 +1001,16 @@ class ISOHandler:
                             continue
                         
                         # 转换架构类型
-                        arch_map = {0: "x86", 1: "x64", 2: "ARM64"}
-                        arch = arch_map.get(download_type, "x64")
+                        arch = _ARCH_REVERSE.get(download_type, "x64")
                         
                         # 从URL提取镜像信息
                         # 从下载URL中提取文件名信息（可能不符合标准格式，这里仅用于显示）
                         # 实际下载后的文件会使用标准格式重命名
                         image_info = {}
                         
-                        # Extract filename from URL, removing query parameters
-                        url_path = download_url_uri.split('?')[0]  # Remove query parameters
-                        filename = os.path.basename(url_path) or f"Windows_ISO_{arch}.iso"
+                        # Extract filename from URL (last path segment before query parameters)
+                        match = _FILENAME_RE.match(download_url_uri)
+                        filename = match.group(1) if match else f"Windows_ISO_{arch}.iso"
                         
                         images.append({
                             "id": f"microsoft_{len(images)}",
@@ -593,8 +1026,9 @@ class ISOHandler:
                             "language": target_language
                         })
                 
-                except Exception as e:
+                except (requests.RequestException, ValueError, AttributeError) as e:
                     logger.error(f"Failed to get download link (sku_id={sku_id}): {e}")
+                    self._invalidate_microsoft_skus(os_type, version, language)
                     continue
             
             # 如果仍然没有找到，抛出异常
@@ -647,138 +1081,30 @@ class ISOHandler:
         """
         从微软官网精确获取下载URL（复用_list_microsoft_images的核心逻辑）
         """
+        import requests
+        
         os_type = config.get("os", "").lower()
         language = config.get("language", "zh-CN")
         version = config.get("version", "").lower()
         arch = config.get("arch", "x64").lower()
         
-        # 确定下载页面URL
-        if "windows11" in os_type or "win11" in os_type or "w11" in os_type:
-            download_page_url = "https://www.microsoft.com/software-download/windows11"
-            referer_url = "https://www.microsoft.com/software-download/windows11"
-        elif "windows10" in os_type or "win10" in os_type or "w10" in os_type:
-            download_page_url = "https://www.microsoft.com/software-download/windows10"
-            referer_url = "https://www.microsoft.com/software-download/windows10"
-        else:
-            raise ValueError(f"Unsupported OS type: {os_type}")
-        
-        # 从配置文件获取产品版本ID
-        product_edition_ids = self._get_product_edition_ids_from_config(os_type, version)
-        
-        # 微软API配置
-        org_id = "y6jn8c31"
-        profile_id = "606624d44113"
-        timeout = 30
-        
-        # 为每个productEditionId生成sessionId并获取SKU信息
-        session_ids = []
-        sku_data = {}
-        
-        for idx, edition_id in enumerate(product_edition_ids):
-            session_id = str(uuid.uuid4())
-            session_ids.append(session_id)
-            
-            # 步骤1: 白名单sessionId
-            tags_url = f"https://vlscppe.microsoft.com/tags?org_id={org_id}&session_id={session_id}"
-            try:
-                response = requests.get(tags_url, timeout=timeout, allow_redirects=False)
-            except Exception as e:
-                logger.error(f"Failed to whitelist sessionId: {e}")
-                continue
-            
-            # 步骤2: 获取SKU信息
-            sku_url = (
-                f"https://www.microsoft.com/software-download-connector/api/getskuinformationbyproductedition"
-                f"?profile={profile_id}"
-                f"&productEditionId={edition_id}"
-                f"&SKU=undefined"
-                f"&friendlyFileName=undefined"
-                f"&Locale={language}"
-                f"&sessionID={session_id}"
-            )
-            
-            try:
-                session = requests.Session()
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    "Accept": "application/json, text/plain, */*",
-                    "Accept-Language": f"{language},en-US;q=0.9",
-                    "Referer": referer_url,
-                    "Origin": "https://www.microsoft.com"
-                }
-                response = session.get(sku_url, headers=headers, timeout=timeout)
-                response.raise_for_status()
-                
-                try:
-                    sku_info = response.json()
-                except ValueError:
-                    content_type = response.headers.get('Content-Type', '').lower()
-                    if 'html' in content_type:
-                        raise Exception(f"API returned HTML format: {content_type}")
-                    try:
-                        sku_info = response.json()
-                    except ValueError as e:
-                        raise Exception(f"Failed to parse JSON response: {e}")
-                
-                if sku_info.get("Errors"):
-                    error_msg = sku_info["Errors"][0].get("Value", "Unknown error")
-                    raise Exception(f"Failed to get SKU information: {error_msg}")
-                
-                # 解析SKU信息
-                for sku in sku_info.get("Skus", []):
-                    lang = sku.get("Language", "")
-                    sku_id = sku.get("Id", "")
-                    if not sku_id:
-                        continue
-                    if lang not in sku_data:
-                        sku_data[lang] = {
-                            "DisplayName": sku.get("LocalizedLanguage", lang),
-                            "Data": []
-                        }
-                    sku_data[lang]["Data"].append({
-                        "SessionIndex": idx,
-                        "SkuId": sku_id
-                    })
-            
-            except Exception as e:
-                logger.error(f"Failed to get SKU info (edition_id={edition_id}): {e}")
-                continue
-        
-        if not sku_data:
-            raise ValueError("Failed to get SKU information, please check network connection or try again later")
-        
-        # 语言代码映射
-        api_name_to_code = {
-            "chinese (simplified)": "zh-CN",
-            "chinese (traditional)": "zh-TW",
-            "english": "en-US",
-            "english international": "en-US",
-        }
-        
-        code_to_api_name = {}
-        for api_name, code in api_name_to_code.items():
-            if code not in code_to_api_name:
-                code_to_api_name[code] = []
-            code_to_api_name[code].append(api_name)
+        sku_data, session_ids = self._query_microsoft_skus(os_type, version, language)
+        referer_url = _MS_REFERER_URLS[_detect_os_key(os_type)]
         
         # 匹配语言
-        target_language = None
         language_lower = language.lower()
         
-        for lang in sku_data.keys():
-            if lang.lower() == language_lower:
-                target_language = lang
-                break
+        lower_to_orig: dict[str, str] = {}
+        for lang in sku_data:
+            lower_to_orig.setdefault(lang.lower(), lang)
+        
+        target_language = lower_to_orig.get(language_lower)
         
         if not target_language:
-            if language_lower in code_to_api_name:
-                for api_name in code_to_api_name[language_lower]:
-                    for lang in sku_data.keys():
-                        if lang.lower() == api_name.lower():
-                            target_language = lang
-                            break
-                    if target_language:
-                        break
+            for api_name in _CODE_TO_API_NAME.get(language_lower, ()):
+                target_language = lower_to_orig.get(api_name)
+                if target_language:
+                    break
         
         if not target_language:
             target_language = list(sku_data.keys())[0]
@@ -787,18 +1113,15 @@ class ISOHandler:
         language_info = sku_data[target_language]
         
         # 架构映射
-        arch_map = {"x86": 0, "x64": 1, "arm64": 2}
-        target_arch_type = arch_map.get(arch, 1)
+        target_arch_type = _ARCH_MAP.get(arch, 1)
         
         # 获取下载链接（只返回匹配架构的第一个）
-        for entry in language_info["Data"]:
-            session_idx = entry["SessionIndex"]
-            sku_id = entry["SkuId"]
+        for session_idx, sku_id in language_info["Data"]:
             session_id = session_ids[session_idx]
             
             download_url = (
                 f"https://www.microsoft.com/software-download-connector/api/GetProductDownloadLinksBySku"
-                f"?profile={profile_id}"
+                f"?profile={_MS_PROFILE_ID}"
                 f"&productEditionId=undefined"
                 f"&SKU={sku_id}"
                 f"&friendlyFileName=undefined"
@@ -807,25 +1130,18 @@ class ISOHandler:
             )
             
             try:
-                session = requests.Session()
-                headers = {
-                    "Referer": referer_url,
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    "Accept": "application/json, text/plain, */*",
-                    "Accept-Language": f"{language},en-US;q=0.9",
-                    "Origin": "https://www.microsoft.com"
-                }
-                response = session.get(download_url, headers=headers, timeout=timeout)
+                headers = _ms_api_headers(referer_url, language)
+                response = self._http.get(download_url, headers=headers, timeout=_MS_API_TIMEOUT)
                 response.raise_for_status()
-                download_info = response.json()
+                download_info = _json_loads(response.content)
                 
                 if download_info.get("Errors"):
                     error = download_info["Errors"][0]
                     if error.get("Type") == 9:
-                        raise Exception("Your IP address has been banned by Microsoft or is in a sanctioned region.")
+                        raise ValueError("Your IP address has been banned by Microsoft or is in a sanctioned region.")
                     else:
                         error_msg = error.get("Value", "Unknown error")
-                        raise Exception(f"Failed to get download link: {error_msg}")
+                        raise ValueError(f"Failed to get download link: {error_msg}")
                 
                 # 查找匹配架构的下载选项
                 for option in download_info.get("ProductDownloadOptions", []):
@@ -837,10 +1153,9 @@ class ISOHandler:
                     
                     # 只返回匹配架构的URL
                     if download_type == target_arch_type:
-                        arch_map_reverse = {0: "x86", 1: "x64", 2: "ARM64"}
-                        arch_name = arch_map_reverse.get(download_type, "x64")
-                        url_path = download_url_uri.split('?')[0]
-                        filename = os.path.basename(url_path) or f"Windows_ISO_{arch_name}.iso"
+                        arch_name = _ARCH_REVERSE.get(download_type, "x64")
+                        match = _FILENAME_RE.match(download_url_uri)
+                        filename = match.group(1) if match else f"Windows_ISO_{arch_name}.iso"
                         
                         return {
                             "url": download_url_uri,
@@ -853,8 +1168,9 @@ class ISOHandler:
                             "version": version.upper() if version else ""
                         }
             
-            except Exception as e:
+            except (requests.RequestException, ValueError, AttributeError) as e:
                 logger.error(f"Failed to get download link (sku_id={sku_id}): {e}")
+                self._invalidate_microsoft_skus(os_type, version, language)
                 continue
         
         raise ValueError(
@@ -865,6 +1181,9 @@ class ISOHandler:
         """
         从MSDN镜像站精确获取magnet链接（复用_list_msdn_images的核心逻辑）
         """
+        import requests
+        from lxml.etree import LxmlError
+        
         os_type = config.get("os", "").lower()
         version = config.get("version", "").lower()
         language = config.get("language", "zh-cn")
@@ -873,7 +1192,8 @@ class ISOHandler:
         # 构建要尝试的URL列表
         urls_to_try = []
         
-        if "windows10" in os_type or "win10" in os_type or "w10" in os_type:
+        os_key = _detect_os_key(os_type)
+        if os_key == "Windows 10":
             urls_to_try = [
                 "https://msdn.sjjzm.com/win10.html",
                 "https://msdn.sjjzm.com/windows10.html",
@@ -881,7 +1201,7 @@ class ISOHandler:
             version_pages = ["22h2", "21h2", "21h1", "20h2", "2004", "1909", "1903"]
             for v in version_pages:
                 urls_to_try.append(f"https://msdn.sjjzm.com/win10/{v}.html")
-        elif "windows11" in os_type or "win11" in os_type or "w11" in os_type:
+        elif os_key == "Windows 11":
             urls_to_try = [
                 "https://msdn.sjjzm.com/win11.html",
                 "https://msdn.sjjzm.com/windows11.html",
@@ -892,117 +1212,232 @@ class ISOHandler:
         else:
             raise ValueError(f"Unsupported OS type: {os_type}")
         
-        # 访问页面并解析magnet链接
-        for url in urls_to_try:
+        # 并发获取所有候选页面，按列表顺序扫描（结果与逐个访问时一致），找到匹配后取消其余请求
+        for url, future in self._iter_pages(urls_to_try):
             try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'lxml')
-                    
-                    # 查找所有magnet链接
-                    for link in soup.find_all('a', href=True):
-                        href = str(link.get('href', '')).strip()
-                        if href.startswith('magnet:'):
-                            filename = link.get_text(strip=True) or self._parse_magnet_filename(href)
-                            try:
-                                image_info = self._parse_iso_filename(filename)
-                                # 检查是否匹配配置
-                                if self._matches_config(image_info, config):
-                                    return {
-                                        "url": href,
-                                        "url_type": "magnet",
-                                        "name": filename,
-                                        "architecture": image_info.get("arch", "x64"),
-                                        "language": image_info.get("language", ""),
-                                        "source_type": "ce",
-                                        "source": "msdn",
-                                        "version": image_info.get("version", ""),
-                                        "build": image_info.get("build", ""),
-                                        "checksum": self._parse_magnet_hash(href),
-                                        "size": self._parse_magnet_size(href)
-                                    }
-                            except ValueError:
-                                continue
-                    
-                    # 从表格中提取镜像信息
-                    import re
-                    for table in soup.find_all('table'):
-                        current_image = {}
-                        for row in table.find_all('tr'):
-                            cells = row.find_all(['td', 'th'])
-                            if len(cells) >= 2:
-                                key = cells[0].get_text(strip=True)
-                                value = cells[1].get_text(strip=True)
-                                
-                                if '文件名' in key or 'file' in key.lower():
-                                    current_image['name'] = value
-                                    try:
-                                        image_info = self._parse_iso_filename(value)
-                                        current_image.update(image_info)
-                                    except ValueError:
-                                        current_image = {}
-                                        continue
-                                
-                                elif '大小' in key or 'size' in key.lower():
-                                    size_str = value.replace('GB', '').replace('MB', '').strip()
-                                    try:
-                                        size_val = float(size_str)
-                                        if 'GB' in value:
-                                            current_image['size'] = int(size_val * 1024 * 1024 * 1024)
-                                        elif 'MB' in value:
-                                            current_image['size'] = int(size_val * 1024 * 1024)
-                                    except:
-                                        pass
-                                
-                                elif 'sha-256' in key.lower() or 'sha256' in key.lower():
-                                    current_image['checksum'] = value
-                            
-                            # 查找magnet链接
-                            for cell in cells:
-                                for link in cell.find_all('a', href=True):
-                                    href = str(link.get('href', '')).strip()
-                                    if href.startswith('magnet:'):
-                                        if current_image.get('name'):
-                                            if self._matches_config(current_image, config):
-                                                return {
-                                                    "url": href,
-                                                    "url_type": "magnet",
-                                                    "name": current_image.get('name', ''),
-                                                    "architecture": current_image.get('arch', 'x64'),
-                                                    "language": current_image.get('language', ''),
-                                                    "source_type": "ce",
-                                                    "source": "msdn",
-                                                    "version": current_image.get('version', ''),
-                                                    "build": current_image.get('build', ''),
-                                                    "checksum": current_image.get('checksum', self._parse_magnet_hash(href)),
-                                                    "size": current_image.get('size', self._parse_magnet_size(href))
-                                                }
-                                
-                                cell_text = cell.get_text()
-                                magnet_match = re.search(r'magnet:[^\s\)]+', cell_text)
-                                if magnet_match:
-                                    magnet_url = magnet_match.group()
-                                    if current_image.get('name') and self._matches_config(current_image, config):
-                                        return {
-                                            "url": magnet_url,
-                                            "url_type": "magnet",
-                                            "name": current_image.get('name', ''),
-                                            "architecture": current_image.get('arch', 'x64'),
-                                            "language": current_image.get('language', ''),
-                                            "source_type": "ce",
-                                            "source": "msdn",
-                                            "version": current_image.get('version', ''),
-                                            "build": current_image.get('build', ''),
-                                            "checksum": current_image.get('checksum', self._parse_magnet_hash(magnet_url)),
-                                            "size": current_image.get('size', self._parse_magnet_size(magnet_url))
-                                        }
-                                    current_image = {}
-            except Exception as e:
+                tree = future.result()
+                if tree is not None:
+                    result = self._scan_page_for_match(tree, config)
+                    if result is not None:
+                        return result
+            except (requests.RequestException, LxmlError) as e:
                 logger.error(f"Failed to parse MSDN page {url}: {e}")
                 continue
         
         raise ValueError(f"Unable to get matching image link from MSDN mirror site")
     
+    def _scan_page_for_match(self, tree: "HtmlElement", config: dict[str, str]) -> dict[str, Any] | None:
+        """
+        在单个MSDN镜像站页面中查找与配置匹配的magnet链接
+        
+        Args:
+            tree: 解析后的页面
+            config: 配置参数（os/version/language/arch）
+        
+        Returns:
+            匹配的镜像信息（格式同fetch_download_url），未找到时返回None
+        """
+        # 查找所有magnet链接
+        for href, filename, image_info in self._iter_magnet_links(tree, _XP_MAGNET_LINKS):
+            if self._matches_config(image_info, config):
+                magnet = _parse_magnet(href)
+                return {
+                    "url": href,
+                    "url_type": "magnet",
+                    "name": filename,
+                    "architecture": image_info.get("arch", "x64"),
+                    "language": image_info.get("language", ""),
+                    "source_type": "ce",
+                    "source": "msdn",
+                    "version": image_info.get("version", ""),
+                    "build": image_info.get("build", ""),
+                    "checksum": magnet.hash,
+                    "size": magnet.size
+                }
+        
+        # 从表格中提取镜像信息
+        for row, cells in self._iter_table_rows(tree):
+            # 查找magnet链接：同一行内 row 不变，是否匹配只需判断一次；
+            # 链接与文本在同一次遍历中检查，命中第一个magnet后即结束本行
+            matched = bool(row.name) and self._matches_image_fields(row.arch, row.language, row.version, config)
+            for cell in cells:
+                magnet_url = None
+                if matched:
+                    for link in _xpath(_XP_LINKS)(cell):
+                        href = link.get('href', '').strip()
+                        if href.startswith('magnet:'):
+                            magnet_url = href
+                            break
+                
+                if magnet_url is None:
+                    cell_text = cell.text_content()
+                    if 'magnet:' in cell_text:
+                        magnet_match = _MAGNET_RE.search(cell_text)
+                        if magnet_match:
+                            magnet_url = magnet_match.group()
+                
+                if magnet_url:
+                    if matched:
+                        magnet = _parse_magnet(magnet_url)
+                        return {
+                            "url": magnet_url,
+                            "url_type": "magnet",
+                            "name": row.name,
+                            "architecture": row.arch or 'x64',
+                            "language": row.language,
+                            "source_type": "ce",
+                            "source": "msdn",
+                            "version": row.version,
+                            "build": row.build,
+                            "checksum": magnet.hash if row.checksum is None else row.checksum,
+                            "size": magnet.size if row.size is None else row.size
+                        }
+                    row.reset()
+                    break
+        
+        return None
+    
+    def _iter_magnet_links(self, node: "HtmlElement", expr: str) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        """
+        遍历节点下文件名可解析的magnet链接（_fetch_msdn_url与_list_msdn_images共用）
+        
+        文件名优先取链接文本，否则取magnet的dn参数；不符合标准格式的文件名直接跳过
+        
+        Args:
+            node: 页面或单元格节点
+            expr: 选取链接的XPath表达式（相对单元格时需使用.//开头的表达式）
+        
+        Yields:
+            (magnet链接, 文件名, 文件名解析结果)
+        """
+        for link in _xpath(expr)(node):
+            href = link.get('href', '').strip()
+            if not href.startswith('magnet:'):
+                continue
+            filename = _node_text(link) or _parse_magnet(href).filename
+            image_info = self._try_parse_iso_filename(filename)
+            if image_info is None:
+                continue
+            yield href, filename, image_info
+    
+    def _iter_table_rows(self, tree: "HtmlElement") -> Iterator[tuple[_ImageRow, list["HtmlElement"]]]:
+        """
+        遍历页面表格的各行，累积“键-值”行中的镜像信息（_fetch_msdn_url与_list_msdn_images共用）
+        
+        每个表格开始时镜像信息清空；文件名不符合标准格式的行会清空镜像信息且不产出。
+        调用方在某行中取得magnet链接后，可通过row.reset()重置镜像信息
+        
+        Args:
+            tree: 解析后的页面
+        
+        Yields:
+            (当前累积的镜像信息, 该行的单元格列表)，各行产出的是同一个_ImageRow实例
+        """
+        image_row = _ImageRow()
+        for table in _xpath(_XP_TABLES)(tree):
+            image_row.reset()
+            for row in _xpath(_XP_ROWS)(table):
+                cells = _xpath(_XP_CELLS)(row)
+                if len(cells) >= 2:
+                    key = _node_text(cells[0])
+                    value = _node_text(cells[1])
+                    
+                    if '文件名' in key or 'file' in key.lower():
+                        # 尝试解析文件名（可能不符合标准格式）
+                        image_info = self._try_parse_iso_filename(value)
+                        if image_info is None:
+                            # 如果不符合标准格式，跳过
+                            image_row.reset()
+                            continue
+                        image_row.name = value
+                        image_row.arch = image_info["arch"]
+                        image_row.language = image_info["language"]
+                        image_row.version = image_info["version"]
+                        image_row.build = image_info["build"]
+                    
+                    elif '大小' in key or 'size' in key.lower():
+                        size_match = _SIZE_RE.fullmatch(value)
+                        if size_match:
+                            size_val = float(size_match.group(1))
+                            image_row.size = int(size_val * _SIZE_UNITS[size_match.group(2).upper()])
+                    
+                    elif 'sha-256' in key.lower() or 'sha256' in key.lower():
+                        image_row.checksum = value
+                
+                yield image_row, cells
+    
+    def _iter_pages(self, urls: list[str]) -> Iterator[tuple[str, Future]]:
+        """
+        并发获取一组MSDN镜像站页面，按urls顺序产出(url, Future)，Future的结果同_get_page
+        
+        调用方提前结束迭代时（生成器关闭），取消尚未开始的请求，不等待进行中的请求
+        """
+        executor = ThreadPoolExecutor(max_workers=min(8, len(urls)) or 1, thread_name_prefix='msdn')
+        try:
+            futures = [executor.submit(self._get_page, url) for url in urls]
+            yield from zip(urls, futures)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _get_page(self, url: str, ttl: float = _MSDN_PAGE_TTL) -> "HtmlElement | None":
+        """
+        获取并解析MSDN镜像站页面，按URL缓存解析结果（列表和精确获取会反复访问同一批页面）
+        
+        Args:
+            url: 页面URL
+            ttl: 缓存有效期（秒）
+        
+        Returns:
+            解析后的页面；HTTP状态码不是200或页面为空时返回None（不缓存）；
+            页面中没有任何magnet链接时返回None（缓存，两种扫描在这类页面上都不会有结果）
+        """
+        cached = self._page_cache.get(url)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+        
+        import lxml.html
+        from lxml.etree import ParserError, XMLSyntaxError
+        # 边下载边增量解析：不再先拼出完整的response.text再构建DOM，
+        # 解析与网络传输重叠，峰值内存也不包含整页HTML的解码副本
+        with self._http.get(url, timeout=_MSDN_PAGE_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            # 仅在响应头声明了charset时指定编码，否则交由lxml根据<meta charset>识别
+            # （requests对未声明charset的text/html默认使用ISO-8859-1，中文页面会乱码）
+            content_type = response.headers.get('Content-Type', '').lower()
+            encoding = response.encoding if 'charset=' in content_type else None
+            # 候选URL中有不少是不含magnet链接的页面（如不存在的版本页面）：出现"magnet:"之前只暂存数据，
+            # 直到确认页面中有magnet链接才创建解析器，没有时整页都不解析
+            parser = None
+            pending: list[bytes] = []
+            tail = b''
+            for chunk in response.iter_content(chunk_size=_MSDN_CHUNK_SIZE):
+                if parser is not None:
+                    parser.feed(chunk)
+                    continue
+                pending.append(chunk)
+                # 同时检查跨越数据块边界的情况（tail保留已读数据的最后6个字节）
+                if b'magnet:' not in chunk and b'magnet:' not in tail + chunk[:6]:
+                    tail = (tail + chunk[-6:])[-6:]
+                    continue
+                parser = lxml.html.HTMLParser(encoding=encoding)
+                for data in pending:
+                    parser.feed(data)
+                pending.clear()
+        if parser is None:
+            self._page_cache[url] = (now, None)
+            return None
+        try:
+            tree = parser.close()
+        except (ParserError, XMLSyntaxError):
+            # 空文档
+            return None
+        if tree is None:
+            return None
+        self._page_cache[url] = (now, tree)
+        return tree
+    
     def _matches_config(self, image_info: dict[str, Any], config: dict[str, str]) -> bool:
         """
         检查镜像信息是否匹配配置
@@ -1011,27 +1446,47 @@ class ISOHandler:
             image_info: 镜像信息字典
             config: 配置参数
         
+        Returns:
+            是否匹配
+        """
+        return self._matches_image_fields(
+            image_info.get("arch", ""), image_info.get("language", ""), image_info.get("version", ""), config
+        )
+    
+    def _matches_image_fields(self, image_arch: str, image_lang: str, image_version: str,
+                              config: dict[str, str]) -> bool:
+        """
+        检查镜像的架构、语言、版本是否匹配配置（_matches_config的实现，表格行信息直接传入字段）
+        
+        Args:
+            image_arch: 镜像架构，空字符串表示未知（不参与比较）
+            image_lang: 镜像语言，空字符串表示未知
+            image_version: 镜像版本号，空字符串表示未知
+            config: 配置参数
+        
         Returns:
             是否匹配
         """
         # 检查架构
         arch = config.get("arch", "x64").lower()
-        image_arch = image_info.get("arch", "").lower()
+        image_arch = image_arch.lower()
         if arch and image_arch and arch != image_arch:
             return False
         
         # 检查语言
         language = config.get("language", "").lower()
-        image_lang = image_info.get("language", "").lower()
+        image_lang = image_lang.lower()
         if language and image_lang:
-            # 支持部分匹配（如zh-cn匹配zh-CN）
-            if language.replace("-", "") not in image_lang.replace("-", "") and image_lang.replace("-", "") not in language.replace("-", ""):
+            # 支持部分匹配（如zh-cn匹配zh-CN），去除连字符后的形式只计算一次
+            language_n = language.replace("-", "")
+            image_lang_n = image_lang.replace("-", "")
+            if language_n not in image_lang_n and image_lang_n not in language_n:
                 return False
         
         # 检查版本（如果配置中指定了版本）
         version = config.get("version", "").lower()
         if version:
-            image_version = image_info.get("version", "").lower()
+            image_version = image_version.lower()
             if image_version and version not in image_version and image_version not in version:
                 return False
         
@@ -1041,21 +1496,24 @@ class ISOHandler:
         """
         从 msdn.sjjzm.com 获取镜像列表（HTML解析，仅支持magnet/BT链接）
         """
+        import requests
+        from lxml.etree import LxmlError
+        
         images = []
         
         # 根据过滤选项确定要访问的页面
         os_type = filter_options.get("os", "").lower() if filter_options else ""
         
         # 如果没有指定OS类型，直接抛异常
-        if not os_type or ("windows10" not in os_type and "win10" not in os_type and "w10" not in os_type and 
-                          "windows11" not in os_type and "win11" not in os_type and "w11" not in os_type):
+        os_key = _detect_os_key(os_type)
+        if os_key is None:
             raise ValueError("OS type (Windows10 or Windows11) must be specified to get image list from MSDN mirror site")
         
         try:
             # 构建要尝试的URL列表
             urls_to_try = []
             
-            if "windows10" in os_type or "win10" in os_type or "w10" in os_type:
+            if os_key == "Windows 10":
                 # Windows 10页面
                 urls_to_try = [
                     "https://msdn.sjjzm.com/win10.html",
@@ -1066,7 +1524,7 @@ class ISOHandler:
                 version_pages = ["22h2", "21h2", "21h1", "20h2", "2004", "1909", "1903"]
                 for version in version_pages:
                     urls_to_try.append(f"https://msdn.sjjzm.com/win10/{version}.html")
-            elif "windows11" in os_type or "win11" in os_type or "w11" in os_type:
+            else:
                 # Windows 11页面
                 urls_to_try = [
                     "https://msdn.sjjzm.com/win11.html",
@@ -1078,140 +1536,51 @@ class ISOHandler:
                 for version in version_pages:
                     urls_to_try.append(f"https://msdn.sjjzm.com/win11/{version}.html")
             
-            # 访问页面并解析magnet链接
-            for url in urls_to_try:
+            # 并发获取所有候选页面，按列表顺序解析，找到镜像后取消其余请求
+            for url, future in self._iter_pages(urls_to_try):
                 try:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.text, 'lxml')
-                        
+                    tree = future.result()
+                    if tree is not None:
                         # 查找所有magnet链接
-                        for link in soup.find_all('a', href=True):
-                            href = str(link.get('href', '')).strip()
-                            text = link.get_text(strip=True)
-                            
-                            # 仅检查magnet链接
-                            if href.startswith('magnet:'):
-                                # 尝试解析文件名（可能不符合标准格式）
-                                            filename = text or self._parse_magnet_filename(href)
-                                            try:
-                                                image_info = self._parse_iso_filename(filename)
-                                            except ValueError:
-                                                # 如果不符合标准格式，跳过
-                                                continue
-                                            
-                                            images.append({
-                                                "id": f"msdn_magnet_{len(images)}",
-                                                "name": filename,
-                                                "version": image_info.get("version", ""),
-                                                "build": image_info.get("build", ""),
-                                                "build_major": image_info.get("build_major", ""),
-                                                "build_minor": image_info.get("build_minor", ""),
-                                                "architecture": image_info.get("arch", "x64"),
-                                                "language": image_info.get("language", ""),
-                                                "source_type": "ce",  # msdn 镜像站标记为 Consumer Editions
-                                                "os_type": image_info.get("os_type", ""),
-                                                "size": self._parse_magnet_size(href),
-                                                "url": href,
-                                                "url_type": "magnet",
-                                                "source": "msdn",
-                                                "checksum": self._parse_magnet_hash(href)
-                                            })
+                        for href, filename, image_info in self._iter_magnet_links(tree, _XP_MAGNET_LINKS):
+                            images.append(self._build_msdn_image(len(images), href, filename, image_info))
                         
                         # 从表格中提取镜像信息并查找magnet链接
-                        import re
-                        for table in soup.find_all('table'):
-                            current_image = {}
-                            for row in table.find_all('tr'):
-                                cells = row.find_all(['td', 'th'])
-                                if len(cells) >= 2:
-                                    key = cells[0].get_text(strip=True)
-                                    value = cells[1].get_text(strip=True)
-                                    
-                                    if '文件名' in key or 'file' in key.lower():
-                                        current_image['name'] = value
-                                        # 尝试解析文件名（可能不符合标准格式）
-                                        try:
-                                            image_info = self._parse_iso_filename(value)
-                                            current_image.update(image_info)
-                                        except ValueError:
-                                            # 如果不符合标准格式，跳过
-                                            current_image = {}
-                                            continue
-                                    
-                                    elif '大小' in key or 'size' in key.lower():
-                                        size_str = value.replace('GB', '').replace('MB', '').strip()
-                                        try:
-                                            size_val = float(size_str)
-                                            if 'GB' in value:
-                                                current_image['size'] = int(size_val * 1024 * 1024 * 1024)
-                                            elif 'MB' in value:
-                                                current_image['size'] = int(size_val * 1024 * 1024)
-                                        except:
-                                            pass
-                                    
-                                    elif 'sha-256' in key.lower() or 'sha256' in key.lower():
-                                        current_image['checksum'] = value
+                        for row, cells in self._iter_table_rows(tree):
+                            # 在单元格中查找magnet链接（可能在文本中或链接标签中）
+                            for cell in cells:
+                                # 方法1: 检查链接标签
+                                for href, filename, image_info in self._iter_magnet_links(cell, _XP_LINKS):
+                                    images.append(self._build_msdn_image(len(images), href, filename, image_info))
                                 
-                                # 在单元格中查找magnet链接（可能在文本中或链接标签中）
-                                for cell in cells:
-                                    # 方法1: 检查链接标签
-                                    for link in cell.find_all('a', href=True):
-                                        href = str(link.get('href', '')).strip()
-                                        text = link.get_text(strip=True)
-                                        
-                                        # 仅检查magnet链接
-                                        if href.startswith('magnet:'):
-                                            # 尝试解析文件名（可能不符合标准格式）
-                                            filename = text or self._parse_magnet_filename(href)
-                                            try:
-                                                image_info = self._parse_iso_filename(filename)
-                                            except ValueError:
-                                                # 如果不符合标准格式，跳过
-                                                continue
-                                            
-                                            images.append({
-                                                "id": f"msdn_magnet_{len(images)}",
-                                                "name": filename,
-                                                "version": image_info.get("version", ""),
-                                                "build": image_info.get("build", ""),
-                                                "build_major": image_info.get("build_major", ""),
-                                                "build_minor": image_info.get("build_minor", ""),
-                                                "architecture": image_info.get("arch", "x64"),
-                                                "language": image_info.get("language", ""),
-                                                "source_type": "ce",  # msdn 镜像站标记为 Consumer Editions
-                                                "os_type": image_info.get("os_type", ""),
-                                                "size": self._parse_magnet_size(href),
-                                                "url": href,
-                                                "url_type": "magnet",
-                                                "source": "msdn",
-                                                "checksum": self._parse_magnet_hash(href)
-                                            })
-                                    
-                                    # 方法2: 在文本中查找magnet链接（正则表达式）
-                                    cell_text = cell.get_text()
-                                    magnet_match = re.search(r'magnet:[^\s\)]+', cell_text)
-                                    if magnet_match:
-                                        magnet_url = magnet_match.group()
-                                        if current_image.get('name'):
-                                            images.append({
-                                                "id": f"msdn_magnet_{len(images)}",
-                                                "name": current_image.get('name', ''),
-                                                "version": current_image.get('version', ''),
-                                                "edition": current_image.get('edition', ''),
-                                                "architecture": current_image.get('arch', 'x64'),
-                                                "size": current_image.get('size', self._parse_magnet_size(magnet_url)),
-                                                "url": magnet_url,
-                                                "url_type": "magnet",
-                                                "source": "msdn",
-                                                "checksum": current_image.get('checksum', self._parse_magnet_hash(magnet_url))
-                                            })
-                                            current_image = {}  # 重置当前镜像信息
+                                # 方法2: 在文本中查找magnet链接（正则表达式），仅在已解析出文件名时才有意义
+                                if not row.name:
+                                    continue
+                                cell_text = cell.text_content()
+                                if 'magnet:' not in cell_text:
+                                    continue
+                                magnet_match = _MAGNET_RE.search(cell_text)
+                                if magnet_match:
+                                    magnet_url = magnet_match.group()
+                                    magnet = _parse_magnet(magnet_url)
+                                    images.append({
+                                        "id": f"msdn_magnet_{len(images)}",
+                                        "name": row.name,
+                                        "version": row.version,
+                                        "edition": row.edition,
+                                        "architecture": row.arch or 'x64',
+                                        "size": magnet.size if row.size is None else row.size,
+                                        "url": magnet_url,
+                                        "url_type": "magnet",
+                                        "source": "msdn",
+                                        "checksum": magnet.hash if row.checksum is None else row.checksum
+                                    })
+                                    row.reset()  # 重置当前镜像信息
                         
                         # 如果找到了镜像，跳出循环
                         if images:
                             break
-                except Exception as e:
+                except (requests.RequestException, LxmlError):
                     continue
             
             # 如果仍然没有找到，抛出异常
@@ -1223,54 +1592,39 @@ class ISOHandler:
         
         return self._filter_images(images, filter_options)
     
-    def _parse_magnet_filename(self, magnet_link: str) -> str:
-        """从magnet链接解析文件名"""
-        try:
-            import urllib.parse
-            parsed = urllib.parse.urlparse(magnet_link)
-            params = urllib.parse.parse_qs(parsed.query)
-            return params.get('dn', [''])[0]
-        except:
-            pass
-        return ""
-    
-    def _parse_magnet_size(self, magnet_link: str) -> int:
-        """从magnet链接解析文件大小"""
-        try:
-            import urllib.parse
-            parsed = urllib.parse.urlparse(magnet_link)
-            params = urllib.parse.parse_qs(parsed.query)
-            return int(params.get('xl', ['0'])[0])
-        except:
-            pass
-        return 0
-    
-    def _parse_magnet_hash(self, magnet_link: str) -> str:
-        """从magnet链接解析BT哈希"""
-        try:
-            import urllib.parse
-            parsed = urllib.parse.urlparse(magnet_link)
-            params = urllib.parse.parse_qs(parsed.query)
-            btih = params.get('xt', [''])[0].replace('urn:btih:', '')
-            return btih
-        except:
-            pass
-        return ""
+    def _build_msdn_image(self, index: int, href: str, filename: str, image_info: dict[str, Any]) -> dict[str, Any]:
+        """根据magnet链接及其文件名解析结果构造MSDN镜像列表项"""
+        magnet = _parse_magnet(href)
+        return {
+            "id": f"msdn_magnet_{index}",
+            "name": filename,
+            "version": image_info.get("version", ""),
+            "build": image_info.get("build", ""),
+            "build_major": image_info.get("build_major", ""),
+            "build_minor": image_info.get("build_minor", ""),
+            "architecture": image_info.get("arch", "x64"),
+            "language": image_info.get("language", ""),
+            "source_type": "ce",  # msdn 镜像站标记为 Consumer Editions
+            "os_type": image_info.get("os_type", ""),
+            "size": magnet.size,
+            "url": href,
+            "url_type": "magnet",
+            "source": "msdn",
+            "checksum": magnet.hash
+        }
     
     def _list_local_images(self, filter_options: dict[str, str] | None) -> list[dict[str, Any]]:
         """扫描本地缓存目录"""
         images = []
         
-        logger.info(f"Scanning local cache directory: {self.cache_dir.resolve()}")
+        logger.info(f"Scanning local cache directory: {self._cache_dir_real}")
         
         if not self.cache_dir.exists():
             logger.warning(f"Cache directory does not exist: {self.cache_dir}")
             return images
         
-        # 删除非ISO格式文件
-        self._cleanup_non_iso_files()
-        
-        iso_files = list(self.cache_dir.glob("*.iso"))
+        # 删除非ISO格式文件，同时取得ISO文件的目录项（带缓存的stat信息）
+        iso_files = self._cleanup_non_iso_files()
         logger.info(f"Found {len(iso_files)} ISO file(s) in cache directory")
         
         for iso_file in iso_files:
@@ -1309,7 +1663,7 @@ class ISOHandler:
                     logger.info(f"Non-standard filename, skipping identification: {iso_file.name}")
                 
                 image_data = {
-                    "id": f"local_{iso_file.stem}",
+                    "id": f"local_{os.path.splitext(iso_file.name)[0]}",
                     "name": iso_file.name,
                     "version": image_info.get("version", ""),
                     "build": image_info.get("build", ""),
@@ -1320,7 +1674,7 @@ class ISOHandler:
                     "source_type": image_info.get("source_type", ""),
                     "os_type": image_info.get("os_type", ""),
                     "size": iso_file.stat().st_size,
-                    "url": str(iso_file),
+                    "url": iso_file.path,
                     "url_type": "local",
                     "source": "local",
                     "checksum": image_info.get("checksum", ""),
@@ -1332,7 +1686,6 @@ class ISOHandler:
                 
             except Exception as e:
                 logger.error(f"Failed to process ISO file {iso_file.name}: {e}")
-                import traceback
                 traceback.print_exc()
         
         logger.info(f"Total images before filtering: {len(images)}")
@@ -1341,23 +1694,41 @@ class ISOHandler:
         
         return filtered_images
     
-    def _cleanup_non_iso_files(self):
-        """删除缓存目录中的非ISO格式文件"""
+    def _cleanup_non_iso_files(self) -> list[os.DirEntry]:
+        """
+        删除缓存目录中的非ISO格式文件
+        
+        使用os.scandir遍历，目录项自带文件类型和stat缓存，避免逐个文件额外stat
+        
+        Returns:
+            保留下来的ISO文件目录项列表
+        """
+        iso_entries: list[os.DirEntry] = []
         if not self.cache_dir.exists():
-            return
+            return iso_entries
         
         deleted_count = 0
-        for file_path in self.cache_dir.iterdir():
-            if file_path.is_file() and not file_path.name.lower().endswith('.iso'):
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.startswith(_ISO_INDEX_FILENAME):
+                    # SHA256缓存边车文件（及写入时的临时文件）
+                    continue
+                if not entry.is_file():
+                    continue
+                if entry.name.lower().endswith('.iso'):
+                    iso_entries.append(entry)
+                    continue
                 try:
-                    logger.info(f"Deleting non-ISO file: {file_path.name}")
-                    file_path.unlink()
+                    logger.info(f"Deleting non-ISO file: {entry.name}")
+                    os.unlink(entry.path)
                     deleted_count += 1
                 except Exception as e:
-                    logger.error(f"Failed to delete non-ISO file {file_path.name}: {e}")
+                    logger.error(f"Failed to delete non-ISO file {entry.name}: {e}")
         
         if deleted_count > 0:
             logger.info(f"Deleted {deleted_count} non-ISO file(s) from cache directory")
+        
+        return iso_entries
     
     def identify_iso(self, iso_path: str) -> dict[str, Any]:
         """
@@ -1420,7 +1791,6 @@ class ISOHandler:
             }
         except Exception as e:
             logger.error(f"Failed to identify ISO file {iso_path}: {e}")
-            import traceback
             traceback.print_exc()
             return {
                 "success": False,
@@ -1500,8 +1870,8 @@ class ISOHandler:
             logger.info(f"Copying file: {source_path} -> {target_path}")
             logger.info(f"Source file size: {source_size / (1024**3):.2f} GB ({source_size:,} bytes)")
             
-            # 使用 copy2 复制文件（保留元数据）
-            shutil.copy2(source_path, target_path)
+            # 复制文件（保留元数据），数据尽量在内核中完成复制
+            _fast_copy(source_path, target_path)
             
             # 验证复制结果
             if not target_path.exists():
@@ -1527,7 +1897,6 @@ class ISOHandler:
             }
         except Exception as e:
             logger.error(f"File copy failed: {e}")
-            import traceback
             traceback.print_exc()
             # 如果复制失败，尝试删除不完整的目标文件
             if target_path.exists():
@@ -1569,50 +1938,22 @@ class ISOHandler:
         Raises:
             ValueError: 如果文件名不符合标准格式
         """
-        # 移除路径，只保留文件名
-        filename = os.path.basename(filename)
-        
-        # 移除 .iso 扩展名
-        if filename.lower().endswith('.iso'):
-            filename = filename[:-4]
-        
-        # 正则表达式匹配格式: win11me_25h2_26200_6584_zh-cn_x64
-        pattern = r'^(win11|win10)(me|ce)_(\d{2}h\d)_(\d+)_(\d+)_([a-z]{2}(?:-[a-z]{2})?)_(x64|x86|arm64)$'
-        match = re.match(pattern, filename.lower())
-        
-        if not match:
-            raise ValueError(
-                f"文件名不符合标准格式: {filename}\n"
-                f"期望格式: {{大版本}}{{me/ce}}_{{版本号}}_{{主构建号}}_{{次构建号}}_{{语言}}_{{架构}}.iso\n"
-                f"示例: win11me_25h2_26200_6584_zh-cn_x64.iso"
-            )
-        
-        os_prefix = match.group(1)
-        source_type = match.group(2)
-        version = match.group(3).upper()
-        build_major = match.group(4)
-        build_minor = match.group(5)
-        language = match.group(6).lower()
-        arch = match.group(7).lower()
-        
-        # 确定操作系统类型
-        if os_prefix == "win11":
-            os_type = "Windows11"
-        elif os_prefix == "win10":
-            os_type = "Windows10"
-        else:
-            raise ValueError(f"Unsupported OS prefix: {os_prefix}")
+        # 解析结果按文件名缓存（MSDN页面扫描时同一文件名会被反复解析），返回副本供调用方修改
+        return dict(_parse_iso_filename_cached(filename))
+    
+    def _try_parse_iso_filename(self, filename: str) -> dict[str, str] | None:
+        """
+        同_parse_iso_filename，但文件名不符合标准格式时返回None而不是抛出异常
         
-        return {
-            "os_type": os_type,
-            "source_type": source_type,
-            "version": version,
-            "build_major": build_major,
-            "build_minor": build_minor,
-            "build": f"{build_major}.{build_minor}",
-            "language": language,
-            "arch": arch
-        }
+        用于MSDN页面扫描：页面上大多数文件名都不是标准格式，先用_ISO_HINT_RE快速排除，
+        只有可能匹配的文件名才进入完整解析
+        """
+        if not _ISO_HINT_RE.search(filename):
+            return None
+        try:
+            return self._parse_iso_filename(filename)
+        except ValueError:
+            return None
     
     def _generate_iso_filename(
         self,
@@ -1640,12 +1981,10 @@ class ISOHandler:
             标准格式的文件名 (不含路径)
         """
         # 确定操作系统前缀
-        if "windows11" in os_type.lower() or "win11" in os_type.lower() or "w11" in os_type.lower():
-            os_prefix = "win11"
-        elif "windows10" in os_type.lower() or "win10" in os_type.lower() or "w10" in os_type.lower():
-            os_prefix = "win10"
-        else:
+        os_key = _detect_os_key(os_type)
+        if os_key is None:
             raise ValueError(f"Unsupported OS type: {os_type}")
+        os_prefix = "win11" if os_key == "Windows 11" else "win10"
         
         # 验证 source_type
         if source_type not in ["me", "ce"]:
@@ -1708,16 +2047,16 @@ class ISOHandler:
         task_id = str(uuid.uuid4())
         start_time = time.time()
         
-        with self._test_lock:
-            self.test_tasks[task_id] = {
-                "source": source,
-                "test_url": test_url,
-                "status": "running",
-                "start_time": start_time,
-                "cancelled": False,
-                "result": None,
-                "error": None
-            }
+        task = {
+            "source": source,
+            "test_url": test_url,
+            "status": "running",
+            "start_time": start_time,
+            "cancelled": False,
+            "result": None,
+            "error": None
+        }
+        self.test_tasks[task_id] = task
         
         # 在后台线程中执行测试
         def _test():
@@ -1736,10 +2075,9 @@ class ISOHandler:
                     test_size = 10 * 1024 * 1024  # 10MB
                     logger.info(f"Starting MSDN mirror speed test (BT), magnet: {magnet_link[:50]}...")
                     
-                    # 创建取消检查函数
+                    # 创建取消检查函数（测速期间频繁轮询，只读单个字段，无需加锁）
                     def check_cancelled():
-                        with self._test_lock:
-                            return self.test_tasks.get(task_id, {}).get("cancelled", False)
+                        return task["cancelled"]
                     
                     speed_result = self.downloader.test_bt_download_speed(
                         magnet_link, 
@@ -1770,11 +2108,11 @@ class ISOHandler:
                         if self.test_tasks[task_id]["cancelled"]:
                             self.test_tasks[task_id]["status"] = "cancelled"
                             return
-                        self.test_tasks[task_id]["status"] = "completed"
                         self.test_tasks[task_id]["result"] = {
                             "latency": latency if latency is not None and latency > 0 else -1,
                             "download_speed": download_speed if download_speed is not None and download_speed > 0 else -1
                         }
+                        self.test_tasks[task_id]["status"] = "completed"
                         
                 elif source == "microsoft":
                     # Microsoft 官方源：使用 HTTP 测试
@@ -1812,23 +2150,22 @@ class ISOHandler:
                     logger.info(f"Final result: latency={final_latency}, download_speed={final_download_speed}")
                     
                     with self._test_lock:
-                        self.test_tasks[task_id]["status"] = "completed"
                         self.test_tasks[task_id]["result"] = {
                             "latency": float(final_latency),
                             "download_speed": float(final_download_speed)
                         }
+                        self.test_tasks[task_id]["status"] = "completed"
                 else:
                     with self._test_lock:
-                        self.test_tasks[task_id]["status"] = "completed"
                         self.test_tasks[task_id]["result"] = {"latency": -1, "download_speed": -1}
+                        self.test_tasks[task_id]["status"] = "completed"
                         
             except Exception as e:
                 logger.error(f"test_mirror failed: {e}")
-                import traceback
                 traceback.print_exc()
                 with self._test_lock:
-                    self.test_tasks[task_id]["status"] = "failed"
                     self.test_tasks[task_id]["error"] = str(e)
+                    self.test_tasks[task_id]["status"] = "failed"
         
         thread = threading.Thread(target=_test, daemon=True)
         thread.start()
@@ -1845,19 +2182,20 @@ class ISOHandler:
         Returns:
             任务状态信息
         """
-        with self._test_lock:
-            if task_id not in self.test_tasks:
-                return {"status": "not_found"}
-            
-            task = self.test_tasks[task_id]
-            elapsed = time.time() - task["start_time"]
-            
-            return {
-                "status": task["status"],
-                "elapsed": int(elapsed),
-                "result": task.get("result"),
-                "error": task.get("error")
-            }
+        # 前端轮询的热路径：只读操作，不加锁（先读status，写入方保证终态status之前结果已写入）
+        task = self.test_tasks.get(task_id)
+        if task is None:
+            return {"status": "not_found"}
+        
+        status = task["status"]
+        elapsed = time.time() - task["start_time"]
+        
+        return {
+            "status": status,
+            "elapsed": int(elapsed),
+            "result": task.get("result"),
+            "error": task.get("error")
+        }
     
     def cancel_test(self, task_id: str) -> bool:
         """
@@ -1914,8 +2252,59 @@ class ISOHandler:
         return {"latency": -1, "download_speed": -1}
     
     def verify_iso(self, file_path: str, expected_sha256: str | None = None) -> dict[str, Any]:
-        """校验ISO文件"""
-        return self.downloader.verify_file(file_path, expected_sha256)
+        """
+        校验ISO文件
+        
+        SHA256按(路径, 大小, 修改时间)缓存到边车文件，文件未变化时直接使用缓存结果，不再读取整个文件
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return self.downloader.verify_file(file_path, expected_sha256)
+        
+        key = os.path.abspath(file_path)
+        with self._iso_index_lock:
+            entry = self._load_iso_index().get(key)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("sha256"):
+            calculated_sha256 = entry["sha256"]
+            valid = not expected_sha256 or calculated_sha256.lower() == expected_sha256.lower()
+            logger.info(f"Using cached SHA256 for {file_path}")
+            return {
+                "valid": valid,
+                "sha256": calculated_sha256,
+                "size": st.st_size,
+                "error": None if valid else "SHA256 mismatch"
+            }
+        
+        result = self.downloader.verify_file(file_path, expected_sha256)
+        if result.get("sha256"):
+            with self._iso_index_lock:
+                self._load_iso_index()[key] = {
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "sha256": result["sha256"]
+                }
+                self._save_iso_index()
+        return result
+    
+    def _load_iso_index(self) -> dict[str, dict[str, Any]]:
+        """获取SHA256缓存（调用方需持有_iso_index_lock），边车文件不存在或损坏时视为空"""
+        if self._iso_index is None:
+            try:
+                index = _json_loads(self._iso_index_path.read_bytes())
+                self._iso_index = index if isinstance(index, dict) else {}
+            except (OSError, ValueError):
+                self._iso_index = {}
+        return self._iso_index
+    
+    def _save_iso_index(self) -> None:
+        """写回SHA256缓存（调用方需持有_iso_index_lock），先写临时文件再替换，写入失败不影响校验结果"""
+        tmp_path = self._iso_index_path.with_name(_ISO_INDEX_FILENAME + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps(self._iso_index, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self._iso_index_path)
+        except OSError as e:
+            logger.warning(f"Failed to save ISO index: {e}")
     
     def delete_iso(self, file_path: str) -> dict[str, bool | str]:
         """删除ISO文件"""
@@ -1923,6 +2312,9 @@ class ISOHandler:
             path = Path(file_path)
             if path.exists() and path.is_file():
                 path.unlink()
+                with self._iso_index_lock:
+                    if self._load_iso_index().pop(os.path.abspath(file_path), None) is not None:
+                        self._save_iso_index()
                 return {"success": True}
             else:
                 return {"success": False, "error": "File does not exist"}
@@ -6,10 +6,24 @@ from pathlib import Path
 from typing import Any, Optional
 
 from iso_reader import ISOReader
-from wim_handler import WIMHandler
+from wim_handler import WIMXmlMetadata
 
 logger = logging.getLogger('ISOInspector')
 
+# /sources 下用于识别的映像文件，按准确度优先级排列
+_WIM_CANDIDATES = ("install.wim", "install.esd", "boot.wim")
+
+# 构建号 -> 版本名，模块级常量，避免每次识别都重新构建
+_BUILD_VERSION_NAMES = {
+    "26100": "24H2",
+    "22631": "23H2",
+    "22621": "22H2",
+    "22000": "21H2",
+    "19045": "22H2",
+    "19044": "21H2",
+    "19043": "21H1",
+}
+
 class ISOInspector:
     """
     ISO 镜像识别服务类
@@ -81,27 +95,30 @@ class ISOInspector:
         使用 ISOReader 提取关键文件进行深度识别
         """
         info = {}
-        reader = ISOReader(str(self.iso_path))
         
         # 使用临时目录存放提取的小文件
         import tempfile
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            tmp_path = Path(tmp_dir)
-            
-            # 1. 尝试查找 lang.ini 获取语言
-            lang_ini_path = tmp_path / "lang.ini"
-            try:
-                reader.extract_file("/sources/lang.ini", str(lang_ini_path))
-                lang = self._parse_lang_ini(lang_ini_path)
-                if lang:
-                    info["language"] = lang
-            except:
-                pass
+        try:
+            with ISOReader(str(self.iso_path)) as reader, tempfile.TemporaryDirectory() as tmp_dir:
+                tmp_path = Path(tmp_dir)
                 
-            # 2. 尝试识别 WIM/ESD 信息
-            wim_info = self._inspect_wim_metadata(reader, tmp_path)
-            if wim_info:
-                info.update(wim_info)
+                # 1. 尝试查找 lang.ini 获取语言
+                lang_ini_path = tmp_path / "lang.ini"
+                try:
+                    reader.extract_file("/sources/lang.ini", str(lang_ini_path))
+                    lang = self._parse_lang_ini(lang_ini_path)
+                    if lang:
+                        info["language"] = lang
+                except:
+                    pass
+                    
+                # 2. 尝试识别 WIM/ESD 信息
+                wim_info = self._inspect_wim_metadata(reader)
+                if wim_info:
+                    info.update(wim_info)
+        except Exception as e:
+            # 无法打开ISO时仍返回文件名解析的结果
+            logger.error(f"Failed to open ISO for content inspection: {e}")
                 
         return info
 
@@ -121,26 +138,24 @@ class ISOInspector:
             pass
         return None
 
-    def _inspect_wim_metadata(self, reader: ISOReader, tmp_path: Path) -> dict[str, Any]:
+    def _inspect_wim_metadata(self, reader: ISOReader) -> dict[str, Any]:
         """
         定位并解析 install.wim/esd 的元数据
         """
-        # 1. 获取 sources 目录下的文件列表以确定最佳识别目标
-        try:
-            files = [f.lower() for f in reader.list_directory("/sources")]
-        except Exception as e:
-            logger.debug(f"Failed to list /sources directory: {e}")
-            return {}
-
-        # 2. 按照准确度优先级确定目标文件
+        # 1. 按照准确度优先级确定目标文件
         # 优先使用安装镜像 (wim > esd)，最后回退到引导镜像 (boot.wim)
-        target_name = None
-        if "install.wim" in files:
-            target_name = "install.wim"
-        elif "install.esd" in files:
-            target_name = "install.esd"
-        elif "boot.wim" in files:
-            target_name = "boot.wim"
+        # 先按路径直接查找记录，无需列出并解码 /sources 下的所有文件名
+        target_name = next(
+            (name for name in _WIM_CANDIDATES if reader.file_exists(f"/sources/{name}")), None)
+        
+        # 2. 直接查找失败时（如文件名大小写不同），回退到列目录后不区分大小写匹配
+        if not target_name:
+            try:
+                files = {f.lower(): f for f in reader.list_directory("/sources")}
+            except Exception as e:
+                logger.debug(f"Failed to list /sources directory: {e}")
+                return {}
+            target_name = next((files[name] for name in _WIM_CANDIDATES if name in files), None)
             
         if not target_name:
             logger.warning("No suitable WIM/ESD file found in /sources")
@@ -148,31 +163,30 @@ class ISOInspector:
             
         iso_file_path = f"/sources/{target_name}"
         
-        # 3. 提取并解析元数据
+        # 3. 直接读取 WIM 头部定位的 XML 元数据（通常不足 100KB），无需提取整个 WIM（数 GB）
         try:
-            local_wim = tmp_path / "metadata.wim"
-            logger.info(f"Extracting {iso_file_path} for metadata inspection...")
-            reader.extract_file(iso_file_path, str(local_wim))
+            logger.info(f"Reading {iso_file_path} XML metadata for inspection...")
+            with reader.open_file(iso_file_path) as infp:
+                metadata = WIMXmlMetadata.from_stream(infp)
             
-            with WIMHandler(str(local_wim)) as handler:
-                build_major = handler.get_image_info(1, "build") or ""
-                build_minor = handler.get_image_info(1, "sp_build") or "0"
-                arch_name = handler.get_image_info(1, "architecture_name") or "x64"
-                edition = handler.get_image_info(1, "edition") or handler.get_image_info(1, "name") or ""
-                os_type = handler.get_image_info(1, "os_type") or "Windows10"
-                
-                # 映射版本号 (例如 26100 -> 24H2)
-                version_name = self._map_build_to_version(build_major)
-                
-                return {
-                    "version": version_name,
-                    "build_major": build_major,
-                    "build_minor": build_minor,
-                    "build": f"{build_major}.{build_minor}",
-                    "arch": arch_name,
-                    "edition": edition,
-                    "os_type": os_type
-                }
+            build_major = metadata.get_image_info(1, "build") or ""
+            build_minor = metadata.get_image_info(1, "sp_build") or "0"
+            arch_name = metadata.get_image_info(1, "architecture_name") or "x64"
+            edition = metadata.get_image_info(1, "edition") or metadata.get_image_info(1, "name") or ""
+            os_type = metadata.get_image_info(1, "os_type") or "Windows10"
+            
+            # 映射版本号 (例如 26100 -> 24H2)
+            version_name = self._map_build_to_version(build_major)
+            
+            return {
+                "version": version_name,
+                "build_major": build_major,
+                "build_minor": build_minor,
+                "build": f"{build_major}.{build_minor}",
+                "arch": arch_name,
+                "edition": edition,
+                "os_type": os_type
+            }
         except Exception as e:
             logger.error(f"Failed to inspect metadata from {iso_file_path}: {e}")
             
@@ -180,21 +194,9 @@ class ISOInspector:
 
     def _map_build_to_version(self, build: str) -> str:
         """将构建号映射为友好的版本名"""
-        mapping = {
-            "26100": "24H2",
-            "22631": "23H2",
-            "22621": "22H2",
-            "22000": "21H2",
-            "19045": "22H2",
-            "19044": "21H2",
-            "19043": "21H1",
-        }
-        return mapping.get(build, build)
+        return _BUILD_VERSION_NAMES.get(build, build)
 
     def _calculate_sha256(self) -> str:
-        """计算大文件的 SHA256"""
-        sha256_hash = hashlib.sha256()
-        with open(self.iso_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096 * 1024), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        """计算大文件的 SHA256（hashlib.file_digest复用256KB缓冲区循环readinto()，不为每个块分配新对象）"""
+        with open(self.iso_path, "rb", buffering=0) as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
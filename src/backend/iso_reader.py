@@ -4,6 +4,7 @@ Supports reading files, listing directories, and extracting files from ISO image
 """
 import sys
 import os
+import locale
 import logging
 import tempfile
 import subprocess
@@ -164,25 +165,22 @@ class ISOReader:
         except Exception as e:
             raise FileNotFoundError(f"File not found: {iso_path} ({e})")
     
-    def _decode_filename(self, identifier_bytes: bytes) -> str:
+    def _decode_filename(self, identifier_bytes: bytes, encoding: Optional[str] = None) -> str:
         """
         解码文件名
         
         Args:
             identifier_bytes: 文件名字节串
+            encoding: UDF 文件标识符的编码（pycdlib 已根据首字节的压缩 ID 解析：
+                0x08 -> 'latin-1'，0x10 -> 'utf-16_be'），未知时为 None
         
         Returns:
             解码后的文件名
         """
-        if self.use_udf:
-            # UDF 使用 UTF-16BE 编码
-            try:
-                return identifier_bytes.decode('utf-16-be', errors='ignore').strip('\x00')
-            except:
-                return identifier_bytes.decode('utf-8', errors='ignore').strip('\x00')
-        else:
-            # ISO9660/Joliet 使用 UTF-8 编码
-            return identifier_bytes.decode('utf-8', errors='ignore').strip('\x00')
+        if encoding is None:
+            # 未提供编码时：UDF 按 UTF-16BE，ISO9660/Joliet 按 UTF-8
+            encoding = 'utf-16-be' if self.use_udf else 'utf-8'
+        return identifier_bytes.decode(encoding, errors='replace').strip('\x00')
     
     def get_filesystem_info(self) -> dict[str, Any]:
         """
@@ -250,6 +248,31 @@ class ISOReader:
         except Exception as e:
             raise FileNotFoundError(f"File not found or cannot be read: {iso_path} ({e})")
     
+    def open_file(self, iso_path: str) -> Any:
+        """
+        以流的方式打开 ISO 中的文件（可 seek，只读取实际访问的部分）
+        
+        Args:
+            iso_path: ISO 中的文件路径（如 '/sources/install.wim'）
+        
+        Returns:
+            pycdlib 文件流（上下文管理器）
+        
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        # 标准化路径
+        if not iso_path.startswith('/'):
+            iso_path = '/' + iso_path
+        
+        if self.facade is None:
+            raise RuntimeError("Facade not initialized. Use ISOReader as context manager.")
+        
+        try:
+            return self.facade.open_file_from_iso(iso_path)
+        except Exception as e:
+            raise FileNotFoundError(f"File not found: {iso_path} ({e})")
+    
     def read_file_text(self, iso_path: str, encoding: str = 'utf-8') -> str:
         """
         读取 ISO 中的文本文件
@@ -295,7 +318,8 @@ class ISOReader:
                 try:
                     if hasattr(item, 'file_identifier'):
                         identifier_bytes = item.file_identifier()
-                        name = self._decode_filename(identifier_bytes)
+                        file_ident = getattr(item, 'file_ident', None)
+                        name = self._decode_filename(identifier_bytes, getattr(file_ident, 'encoding', None))
                     else:
                         name = str(item)
                     
@@ -359,15 +383,17 @@ class ISOReader:
                 ]
                 
                 logger.debug(f"Running 7-Zip command: {' '.join(cmd)}")
+                # 以字节方式捕获输出，只在失败时解码一次（成功时的输出不需要）
                 result = subprocess.run(
                     cmd,
                     capture_output=True,
-                    text=True,
                     timeout=3600  # 1小时超时
                 )
                 
                 if result.returncode != 0:
-                    error_msg = result.stderr or result.stdout or "Unknown error"
+                    # 7-Zip 输出使用系统代码页，无法解码的字节直接替换，不会因解码再抛异常
+                    output = result.stderr or result.stdout or b""
+                    error_msg = output.decode(locale.getpreferredencoding(False), errors='replace') or "Unknown error"
                     raise subprocess.CalledProcessError(result.returncode, cmd, error_msg)
                 
                 # 查找提取的文件（7-Zip 会保留目录结构）
@@ -4,20 +4,33 @@ Communicates with Electron frontend via stdin/stdout
 """
 import json
 import os
-import io
 import sys
 import traceback
 import logging
 import inspect
+import functools
+import operator
 import shutil
 import threading
 import tempfile
 import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Callable
-from iso_handler import ISOHandler
-from downloader import Downloader
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, Mapping
+
+if TYPE_CHECKING:
+    from iso_handler import ISOHandler
+    from downloader import Downloader
+    from unattend_generator import UnattendGenerator
+
+# orjson为可选依赖，未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # 设置 stdout 和 stdin 编码为 UTF-8，避免 Windows 上的 GBK 编码问题
 if sys.platform == 'win32':
@@ -39,6 +52,77 @@ logging.basicConfig(
 logger = logging.getLogger('Backend')
 
 
+def _dumps(obj: Any) -> bytes:
+    """
+    将对象序列化为UTF-8编码的JSON字节串
+    
+    Args:
+        obj: 要序列化的对象
+    
+    Returns:
+        JSON字节串
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson不支持的值（如超过64位的整数、孤立代理项）交给标准库处理
+            pass
+    try:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    except UnicodeEncodeError:
+        # 含无法编码为UTF-8的字符（如孤立代理项）时退回ASCII转义
+        return json.dumps(obj, ensure_ascii=True).encode('ascii')
+
+
+# 错误响应结构固定，预先序列化为模板，发送时只填入id和错误信息
+_ERROR_TEMPLATE: bytes = _dumps({"jsonrpc": "2.0", "id": "__ID__", "error": {"code": -1, "message": "__MSG__"}})
+
+
+@functools.lru_cache(maxsize=128)
+def _dumps_error_message(message: str) -> bytes:
+    """序列化错误信息（相同的错误信息只序列化一次）"""
+    return _dumps(message)
+
+
+# 处理器请求参数默认值：与请求参数合并后用itemgetter一次取出全部参数
+_ISO_DOWNLOAD_DEFAULTS: Mapping[str, Any] = MappingProxyType({
+    "source": None,
+    "config": None,
+    "url": None,
+    "url_type": "http",
+    "output_path": None,
+})
+_get_iso_download_params = operator.itemgetter(*_ISO_DOWNLOAD_DEFAULTS)
+
+_DEPLOYMENT_BUILD_DEFAULTS: Mapping[str, Any] = MappingProxyType({
+    "template_iso": None,
+    "export_dir": None,
+    "output_name": None,
+    "integrate_installer": False,
+    "file_mappings": None,
+    "selected_wim_image_index": None,
+    "config": None,
+})
+_get_deployment_build_params = operator.itemgetter(*_DEPLOYMENT_BUILD_DEFAULTS)
+
+
+# 请求未带params时共用的空参数字典（处理器只读取参数，不修改）
+_EMPTY_PARAMS: dict[str, Any] = {}
+
+
+class _RawJSON(bytes):
+    """已序列化的JSON结果，send_response直接拼接到响应中，不再重复序列化"""
+
+
+# ping的结果固定不变，启动时序列化一次
+_PING_RESULT: _RawJSON = _RawJSON(_dumps({"status": "ok", "message": "pong"}))
+
+
+# 解析请求JSON（orjson.JSONDecodeError是json.JSONDecodeError的子类）
+_loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else json.loads
+
+
 class TaskManager:
     """通用异步任务管理器"""
 
@@ -88,7 +172,7 @@ class TaskManager:
                     task["updated_at"] = time.time()
             except Exception as e:
                 logger.error(f"Task {name} failed: {e}")
-                logger.debug("Task error traceback:\n%s", traceback.format_exc())
+                logger.debug("Task error traceback:", exc_info=True)
                 with self._lock:
                     task = self._tasks.get(task_id)
                     if not task:
@@ -139,28 +223,102 @@ class IPCError(Exception):
 class BackendServer:
     """后端服务器，处理来自前端的IPC请求"""
     
-    # iso_handler: "ISOHandler | None"
-    # downloader: "Downloader | None"
-    # download_tasks: dict[str, dict[str, Any]]
-    # project_root: Path
+    # 属性集合固定，使用__slots__省去实例__dict__
+    __slots__ = (
+        'running', '_debug', '_handlers', 'handlers', 'task_manager',
+        '_executor', '_inflight',
+        '_out_queue', '_out_cond', '_out_closed', '_writer_thread',
+        'download_tasks', 'project_root',
+        '_lazy_lock', '_iso_handler', '_downloader', '_unattend_generator', '_unattend_generator_loaded',
+        '_unattend_lock', '_finalize_lock',
+    )
     
     def __init__(self):
         self.running: bool = True
-        self.handlers: dict[str, Callable[..., Any]] = {}
+        self._debug: bool = bool(os.environ.get("IPC_DEBUG"))
+        self._handlers: dict[str, Callable[..., Any]] = {}
+        # 对外只暴露只读视图，注册统一走register_handler
+        self.handlers: Mapping[str, Callable[..., Any]] = MappingProxyType(self._handlers)
         self.task_manager: TaskManager = TaskManager()
-        # 这些属性在run()方法中初始化
-        self.iso_handler = None
-        self.downloader = None
-        self.download_tasks = {}
-        self.project_root = Path(__file__).parent.parent.parent
-        self.unattend_generator = None
+        # 请求在线程池中并发处理，耗时的同步处理器不会阻塞其他请求；响应按id匹配，允许乱序返回
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='ipc')
+        # 限制同时在处理（含排队）的请求数，超过时读取循环阻塞，形成背压
+        self._inflight: threading.BoundedSemaphore = threading.BoundedSemaphore(32)
+        # 响应由单独的写线程输出：同时完成的响应合并为一次write/flush（每批最多8条）
+        self._out_queue: deque[bytes] = deque()
+        self._out_cond: threading.Condition = threading.Condition()
+        self._out_closed: bool = False
+        self._writer_thread: threading.Thread = threading.Thread(target=self._writer_loop, name='ipc-writer', daemon=True)
+        self._writer_thread.start()
+        self.download_tasks: dict[str, dict[str, Any]] = {}  # 存储下载任务
+        # 项目根目录（main.py 在 src/backend/，所以需要向上两级）
+        self.project_root: Path = Path(__file__).parent.parent.parent
+        # 后端处理对象在首次使用时创建，ping等轻量请求无需等待其导入和初始化
+        self._lazy_lock: threading.Lock = threading.Lock()
+        self._iso_handler: "ISOHandler | None" = None
+        self._downloader: "Downloader | None" = None
+        self._unattend_generator: "UnattendGenerator | None" = None
+        self._unattend_generator_loaded: bool = False
+        # 请求并发处理：共享的Unattend生成器在切换语言时会重新加载数据，读写都需持有此锁
+        self._unattend_lock: threading.Lock = threading.Lock()
+        # 下载完成后的重命名每个任务只执行一次，并发的进度查询通过此锁和任务的finalized标志去重
+        self._finalize_lock: threading.Lock = threading.Lock()
+    
+    @property
+    def iso_handler(self) -> "ISOHandler":
+        """ISO镜像处理器，首次访问时创建"""
+        if self._iso_handler is None:
+            with self._lazy_lock:
+                if self._iso_handler is None:
+                    from iso_handler import ISOHandler
+                    cache_dir = self.project_root / "data" / "isos"
+                    self._iso_handler = ISOHandler(cache_dir=str(cache_dir))
+        return self._iso_handler
+    
+    @property
+    def downloader(self) -> "Downloader":
+        """下载器，首次访问时创建"""
+        if self._downloader is None:
+            with self._lazy_lock:
+                if self._downloader is None:
+                    from downloader import Downloader
+                    self._downloader = Downloader()
+        return self._downloader
+    
+    @property
+    def unattend_generator(self) -> "UnattendGenerator | None":
+        """Unattend配置生成器，首次访问时创建；导入失败时为None"""
+        if not self._unattend_generator_loaded:
+            with self._lazy_lock:
+                if not self._unattend_generator_loaded:
+                    try:
+                        from unattend_generator import UnattendGenerator
+                        # 数据目录位于项目根 data/unattend
+                        data_dir = self.project_root / "data" / "unattend"
+                        self._unattend_generator = UnattendGenerator(data_dir=data_dir)
+                    except ImportError as e:
+                        logger.error(f"Failed to import Unattend generator: {e}")
+                    self._unattend_generator_loaded = True
+        return self._unattend_generator
     
     def register_handler(self, method: str, handler: Callable[..., Any]) -> None:
         """注册请求处理器"""
-        self.handlers[method] = handler
+        self._handlers[sys.intern(method)] = handler
     
     def send_response(self, request_id: str | None, result: Any = None, error: str | None = None) -> None:
         """发送响应到前端"""
+        if error:
+            try:
+                # 先填错误信息：序列化后的字符串中引号已转义，不会与"__ID__"占位符冲突
+                payload = _ERROR_TEMPLATE.replace(b'"__MSG__"', _dumps_error_message(error), 1)
+                self._write_message(payload.replace(b'"__ID__"', _dumps(request_id), 1))
+                return
+            except Exception as e:
+                logger.error(f"Error response serialization failed: {e}")
+        elif isinstance(result, _RawJSON):
+            self._write_message(b'{"jsonrpc":"2.0","id":' + _dumps(request_id) + b',"result":' + result + b'}')
+            return
+        
         response = {
             "jsonrpc": "2.0",
             "id": request_id
@@ -176,26 +334,12 @@ class BackendServer:
                 response["result"] = result
         
         try:
-            json_str = json.dumps(response, ensure_ascii=False)
-            # 确保输出使用 UTF-8 编码
-            try:
-                print(json_str, flush=True)  # Keep print for IPC communication
-            except UnicodeEncodeError:
-                # 如果 stdout 编码不是 UTF-8，尝试使用 UTF-8 编码输出
-                import sys
-                if hasattr(sys.stdout, 'buffer'):
-                    sys.stdout.buffer.write(json_str.encode('utf-8'))
-                    sys.stdout.buffer.write(b'\n')
-                    sys.stdout.buffer.flush()
-                else:
-                    # 最后的后备方案：使用 ASCII 编码
-                    json_str_ascii = json.dumps(response, ensure_ascii=True)
-                    print(json_str_ascii, flush=True)
+            self._write_message(_dumps(response))
         except Exception as e:
             # If response serialization fails, try to send error information
             logger.error(f"Response serialization failed: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            if self._debug:
+                logger.error(traceback.format_exc())
             error_response = {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -204,19 +348,69 @@ class BackendServer:
                     "message": f"Response serialization failed: {str(e)}"
                 }
             }
+            self._write_message(json.dumps(error_response, ensure_ascii=True).encode('ascii'))
+    
+    def _write_message(self, payload: bytes) -> None:
+        """
+        将一条已序列化的JSON消息放入输出队列，由写线程写入stdout
+        
+        Args:
+            payload: UTF-8编码的JSON字节串（不含换行符）
+        """
+        with self._out_cond:
+            self._out_queue.append(payload + b'\n')
+            self._out_cond.notify()
+    
+    def _writer_loop(self) -> None:
+        """
+        写线程：取出队列中的响应写入stdout二进制缓冲区
+        
+        收到第一条响应后最多再等待200微秒，把同时完成的响应合并为一次write和flush；
+        每批最多8条，避免单批过大增加延迟
+        """
+        out = sys.stdout.buffer
+        while True:
+            with self._out_cond:
+                while not self._out_queue and not self._out_closed:
+                    self._out_cond.wait()
+                if not self._out_queue:
+                    return
+                if len(self._out_queue) < 8 and not self._out_closed:
+                    self._out_cond.wait(0.0002)
+                batch = [self._out_queue.popleft() for _ in range(min(8, len(self._out_queue)))]
             try:
-                json_str = json.dumps(error_response, ensure_ascii=False)
-                print(json_str, flush=True)
-            except UnicodeEncodeError:
-                # 使用 ASCII 编码作为后备
-                json_str = json.dumps(error_response, ensure_ascii=True)
-                print(json_str, flush=True)
+                out.write(b''.join(batch))
+                out.flush()
+            except Exception as e:
+                logger.error(f"Failed to write response: {e}")
+    
+    def _close_output(self) -> None:
+        """输出队列中剩余的响应并结束写线程"""
+        with self._out_cond:
+            self._out_closed = True
+            self._out_cond.notify()
+        self._writer_thread.join()
+    
+    def _run_request(self, request: Any) -> None:
+        """在工作线程中处理单个请求，完成后释放并发名额"""
+        # 在try之外取出请求ID，异常时仍能带上ID回复，前端对应的请求不会一直挂起
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                self.send_response("", error=f"Request must be a JSON object, got {type(request).__name__}")
+                return
+            self.handle_request(request)
+        except Exception as e:
+            logger.error(f"Request processing failed: {e}")
+            self.send_response(request_id or "", error=f"Request processing failed: {str(e)}")
+        finally:
+            self._inflight.release()
     
     def handle_request(self, request: dict[str, Any]) -> None:
         """处理单个请求"""
         request_id = request.get("id")
         method = request.get("method")
-        params = request.get("params", {})
+        params = request.get("params", _EMPTY_PARAMS)
         
         if not request_id:
             self.send_response("", error="Missing request ID")
@@ -226,37 +420,43 @@ class BackendServer:
             self.send_response(request_id, error="Missing method name")
             return
         
-        # Find handler
-        handler = self.handlers.get(method)
-        if not handler:
+        if not isinstance(method, str):
+            self.send_response(request_id, error=f"Invalid method name: {method!r}")
+            return
+        
+        # Find handler（单次查找，未注册时返回None）
+        handler = self._handlers.get(method)
+        if handler is None:
             logger.warning(f"Unknown method: {method}")
             self.send_response(request_id, error=f"Unknown method: {method}")
             return
         
-        # Execute handler
-        try:
-            # 确保 params 是字典类型
-            if not isinstance(params, dict):
-                logger.error(f"Invalid params type for method {method}: {type(params)}, value: {params}")
-                # 如果 params 是字符串，尝试解析为 JSON
-                if isinstance(params, str):
-                    try:
-                        params = json.loads(params)
-                    except json.JSONDecodeError:
-                        self.send_response(request_id, error=f"params must be a dict or valid JSON string")
-                        return
-                else:
-                    self.send_response(request_id, error=f"params must be a dict, got {type(params)}")
+        # 确保 params 是字典类型
+        if not isinstance(params, dict):
+            logger.error(f"Invalid params type for method {method}: {type(params)}, value: {params}")
+            # 如果 params 是字符串，尝试解析为 JSON
+            if isinstance(params, str):
+                try:
+                    params = json.loads(params)
+                except json.JSONDecodeError:
+                    self.send_response(request_id, error=f"params must be a dict or valid JSON string")
                     return
-            
+            else:
+                self.send_response(request_id, error=f"params must be a dict, got {type(params)}")
+                return
+        
+        # Execute handler（只有处理器调用需要捕获异常）
+        try:
             result = handler(params)
-            self.send_response(request_id, result=result)
         except Exception as e:
             logger.error(f"Handler execution failed for {method}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            # 完整堆栈仅在设置IPC_DEBUG环境变量时输出，避免错误路径上的格式化开销
+            if self._debug:
+                logger.error(traceback.format_exc())
             error_msg = f"{method} execution failed: {str(e)}"
             self.send_response(request_id, error=error_msg)
+            return
+        self.send_response(request_id, result=result)
     
     def run(self):
         """运行服务器主循环"""
@@ -264,83 +464,52 @@ class BackendServer:
         self.register_handler("ping", self._handle_ping)
         self.register_handler("get_platform", self._handle_get_platform)
         
-        # 注册ISO镜像相关处理器
-        try:
-            # # 添加当前目录到Python路径，以便导入同目录下的模块
-            backend_dir = Path(__file__).parent
-            # if str(backend_dir) not in sys.path:
-            #     sys.path.insert(0, str(backend_dir))
-            
-            # from .iso_handler import ISOHandler
-            # from .downloader import Downloader
-            
-            # 计算项目根目录（main.py 在 src/backend/，所以需要向上两级）
-            project_root = backend_dir.parent.parent
-            cache_dir = project_root / "data" / "isos"
-            
-            self.iso_handler: ISOHandler = ISOHandler(cache_dir=str(cache_dir))
-            self.downloader: Downloader = Downloader()
-            self.download_tasks: dict[str, dict[str, Any]] = {}  # 存储下载任务
-            self.project_root: Path = project_root
-            
-            self.register_handler("iso_list_sources", self._handle_iso_list_sources)
-            self.register_handler("iso_list_versions", self._handle_iso_list_versions)
-            self.register_handler("iso_list_images_start", self._handle_iso_list_images_start)
-            self.register_handler("iso_list_images_status", self._handle_iso_list_images_status)
-            self.register_handler("iso_fetch_download_url_start", self._handle_iso_fetch_download_url_start)
-            self.register_handler("iso_fetch_download_url_status", self._handle_iso_fetch_download_url_status)
-            self.register_handler("iso_test_mirror", self._handle_iso_test_mirror)
-            self.register_handler("iso_test_mirror_start", self._handle_iso_test_mirror_start)
-            self.register_handler("iso_test_mirror_status", self._handle_iso_test_mirror_status)
-            self.register_handler("iso_start_test_mirror", self._handle_iso_start_test_mirror)
-            self.register_handler("iso_get_test_status", self._handle_iso_get_test_status)
-            self.register_handler("iso_cancel_test", self._handle_iso_cancel_test)
-            self.register_handler("iso_download", self._handle_iso_download)
-            self.register_handler("iso_download_progress", self._handle_iso_download_progress)
-            self.register_handler("iso_cancel_download", self._handle_iso_cancel_download)
-            self.register_handler("iso_verify", self._handle_iso_verify)
-            self.register_handler("iso_verify_start", self._handle_iso_verify_start)
-            self.register_handler("iso_verify_status", self._handle_iso_verify_status)
-            self.register_handler("iso_delete", self._handle_iso_delete)
-            self.register_handler("iso_import", self._handle_iso_import)
-            self.register_handler("iso_import_start", self._handle_iso_import_start)
-            self.register_handler("iso_import_status", self._handle_iso_import_status)
-            self.register_handler("iso_redownload", self._handle_iso_redownload)
-            self.register_handler("iso_identify", self._handle_iso_identify)
-            self.register_handler("iso_identify_start", self._handle_iso_identify_start)
-            self.register_handler("iso_identify_status", self._handle_iso_identify_status)
-        except ImportError as e:
-            logger.error(f"Failed to import ISO handler: {e}")
+        # 注册ISO镜像相关处理器（ISOHandler/Downloader在首次使用时创建）
+        self.register_handler("iso_list_sources", self._handle_iso_list_sources)
+        self.register_handler("iso_list_versions", self._handle_iso_list_versions)
+        self.register_handler("iso_list_images_start", self._handle_iso_list_images_start)
+        self.register_handler("iso_list_images_status", self._handle_iso_list_images_status)
+        self.register_handler("iso_fetch_download_url_start", self._handle_iso_fetch_download_url_start)
+        self.register_handler("iso_fetch_download_url_status", self._handle_iso_fetch_download_url_status)
+        self.register_handler("iso_test_mirror", self._handle_iso_test_mirror)
+        self.register_handler("iso_test_mirror_start", self._handle_iso_test_mirror_start)
+        self.register_handler("iso_test_mirror_status", self._handle_iso_test_mirror_status)
+        self.register_handler("iso_start_test_mirror", self._handle_iso_start_test_mirror)
+        self.register_handler("iso_get_test_status", self._handle_iso_get_test_status)
+        self.register_handler("iso_cancel_test", self._handle_iso_cancel_test)
+        self.register_handler("iso_download", self._handle_iso_download)
+        self.register_handler("iso_download_progress", self._handle_iso_download_progress)
+        self.register_handler("iso_cancel_download", self._handle_iso_cancel_download)
+        self.register_handler("iso_verify", self._handle_iso_verify)
+        self.register_handler("iso_verify_start", self._handle_iso_verify_start)
+        self.register_handler("iso_verify_status", self._handle_iso_verify_status)
+        self.register_handler("iso_delete", self._handle_iso_delete)
+        self.register_handler("iso_import", self._handle_iso_import)
+        self.register_handler("iso_import_start", self._handle_iso_import_start)
+        self.register_handler("iso_import_status", self._handle_iso_import_status)
+        self.register_handler("iso_redownload", self._handle_iso_redownload)
+        self.register_handler("iso_identify", self._handle_iso_identify)
+        self.register_handler("iso_identify_start", self._handle_iso_identify_start)
+        self.register_handler("iso_identify_status", self._handle_iso_identify_status)
         
-        # 注册 Unattend 配置相关处理器
-        try:
-            from unattend_generator import UnattendGenerator, Configuration
-            # 数据目录位于项目根 data/unattend，相对于 src/backend/main.py 需要上溯两级到项目根
-            data_dir = Path(__file__).parent.parent.parent / "data" / "unattend"
-            self.unattend_generator = UnattendGenerator(data_dir=data_dir)
-            
-            self.register_handler("unattend_export_xml", self._handle_unattend_export_xml)
-            self.register_handler("unattend_import_xml", self._handle_unattend_import_xml)
-            self.register_handler("unattend_get_data", self._handle_unattend_get_data)
-            
-            # Phase 2 & 3: ISO Customize and Burn handlers
-            self.register_handler("iso_customize_start", self._handle_iso_customize_start)
-            self.register_handler("iso_customize_status", self._handle_iso_customize_status)
-            self.register_handler("deployment_list_wim_images", self._handle_deployment_list_wim_images)
-            self.register_handler("deployment_build_start", self._handle_deployment_build_start)
-            self.register_handler("deployment_build_status", self._handle_deployment_build_status)
-            self.register_handler("burn_list_devices", self._handle_burn_list_devices)
-            self.register_handler("burn_start", self._handle_burn_start)
-            self.register_handler("burn_status", self._handle_burn_status)
-        except ImportError as e:
-            logger.error(f"Failed to import Unattend generator: {e}")
-            self.unattend_generator = None
+        # 注册 Unattend 配置相关处理器（UnattendGenerator在首次使用时创建）
+        self.register_handler("unattend_export_xml", self._handle_unattend_export_xml)
+        self.register_handler("unattend_import_xml", self._handle_unattend_import_xml)
+        self.register_handler("unattend_get_data", self._handle_unattend_get_data)
         
-        # 读取stdin并处理请求
-        # 将 stdin 包装为 UTF-8 文本流
-        stdin_text = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+        # Phase 2 & 3: ISO Customize and Burn handlers
+        self.register_handler("iso_customize_start", self._handle_iso_customize_start)
+        self.register_handler("iso_customize_status", self._handle_iso_customize_status)
+        self.register_handler("deployment_list_wim_images", self._handle_deployment_list_wim_images)
+        self.register_handler("deployment_build_start", self._handle_deployment_build_start)
+        self.register_handler("deployment_build_status", self._handle_deployment_build_status)
+        self.register_handler("burn_list_devices", self._handle_burn_list_devices)
+        self.register_handler("burn_start", self._handle_burn_start)
+        self.register_handler("burn_status", self._handle_burn_status)
         
-        for line in stdin_text:
+        # 读取stdin并处理请求
+        # 直接按行读取二进制stdin，json.loads可直接解析UTF-8字节，省去文本层解码
+        for line in sys.stdin.buffer:
             if not self.running:
                 break
             
@@ -349,18 +518,33 @@ class BackendServer:
                 continue
             
             try:
-                request = json.loads(line)
-                self.handle_request(request)
-            except json.JSONDecodeError as e:
+                request = _loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
                 logger.error(f"JSON parsing failed: {e}")
                 self.send_response("", error=f"JSON parsing failed: {str(e)}")
+                continue
+            
+            self._inflight.acquire()
+            try:
+                self._executor.submit(self._run_request, request)
             except Exception as e:
+                self._inflight.release()
                 logger.error(f"Request processing failed: {e}")
                 self.send_response("", error=f"Request processing failed: {str(e)}")
+        
+        # stdin关闭后通知下载器结束BT下载和测速（BT线程池线程不是守护线程，不通知会阻塞进程退出）
+        if self._downloader is not None:
+            self._downloader.close()
+        if self._iso_handler is not None:
+            self._iso_handler.downloader.close()
+        
+        # 等待已提交的请求处理完成，并输出全部响应
+        self._executor.shutdown(wait=True)
+        self._close_output()
     
-    def _handle_ping(self, params: dict[str, Any]) -> dict[str, Any]:
+    def _handle_ping(self, params: dict[str, Any]) -> _RawJSON:
         """处理ping请求"""
-        return {"status": "ok", "message": "pong"}
+        return _PING_RESULT
     
     def _handle_get_platform(self, params: dict[str, Any]) -> dict[str, Any]:
         """获取平台信息"""
@@ -483,11 +667,7 @@ class BackendServer:
     def _handle_iso_download(self, params: dict[str, Any]) -> dict[str, str]:
         """下载镜像 - 支持配置参数或直接URL"""
         # 检查是配置参数还是直接URL
-        source = params.get("source")
-        config = params.get("config")
-        url = params.get("url")
-        url_type = params.get("url_type", "http")
-        output_path = params.get("output_path")
+        source, config, url, url_type, output_path = _get_iso_download_params({**_ISO_DOWNLOAD_DEFAULTS, **params})
         
         if not output_path:
             raise ValueError("Missing output_path parameter")
@@ -664,39 +844,7 @@ class BackendServer:
             
             # 如果下载完成，尝试重命名文件为标准格式
             if progress_info and progress_info.get("status") == "completed":
-                output_path = task_info.get("output_path")
-                source_type = task_info.get("source_type", "ce")
-                
-                if output_path and os.path.exists(output_path):
-                    try:
-                        # 识别ISO版本信息
-                        image_info = self.iso_handler._identify_iso_version(output_path)
-                        
-                        # 如果识别成功，生成标准文件名并重命名
-                        if image_info.get("version") and image_info.get("build_major") and image_info.get("build_minor"):
-                            new_filename = self.iso_handler._generate_iso_filename(
-                                os_type=image_info.get("os_type", ""),
-                                version=image_info.get("version", ""),
-                                build_major=image_info.get("build_major", ""),
-                                build_minor=image_info.get("build_minor", ""),
-                                language=image_info.get("language", "zh-cn"),
-                                arch=image_info.get("arch", "x64"),
-                                source_type=source_type
-                            )
-                            
-                            # 重命名文件
-                            output_dir = os.path.dirname(output_path)
-                            new_path = os.path.join(output_dir, new_filename)
-                            if new_path != output_path:
-                                os.rename(output_path, new_path)
-                                logger.info(f"File renamed to standard format: {new_filename}")
-                                # Update path in task info
-                                task_info["output_path"] = new_path
-                                progress_info["final_path"] = new_path
-                    except Exception as e:
-                        logger.error(f"Failed to rename file after download: {e}")
-                        import traceback
-                        traceback.print_exc()
+                self._finalize_completed_download(task_info, progress_info)
             
             # 更新download_tasks中的进度信息
             task_info.update({
@@ -715,43 +863,59 @@ class BackendServer:
             
             # 如果下载完成，尝试重命名文件为标准格式
             if progress_info.get("status") == "completed" and task_id in self.download_tasks:
-                task_info = self.download_tasks[task_id]
-                output_path = task_info.get("output_path")
-                source_type = task_info.get("source_type", "ce")
-                
-                if output_path and os.path.exists(output_path):
-                    try:
-                        # 识别ISO版本信息
-                        image_info = self.iso_handler._identify_iso_version(output_path)
-                        
-                        # 如果识别成功，生成标准文件名并重命名
-                        if image_info.get("version") and image_info.get("build_major") and image_info.get("build_minor"):
-                            new_filename = self.iso_handler._generate_iso_filename(
-                                os_type=image_info.get("os_type", ""),
-                                version=image_info.get("version", ""),
-                                build_major=image_info.get("build_major", ""),
-                                build_minor=image_info.get("build_minor", ""),
-                                language=image_info.get("language", "zh-cn"),
-                                arch=image_info.get("arch", "x64"),
-                                source_type=source_type
-                            )
-                            
-                            # 重命名文件
-                            output_dir = os.path.dirname(output_path)
-                            new_path = os.path.join(output_dir, new_filename)
-                            if new_path != output_path:
-                                os.rename(output_path, new_path)
-                                logger.info(f"File renamed to standard format: {new_filename}")
-                                # Update path in task info
-                                task_info["output_path"] = new_path
-                                progress_info["final_path"] = new_path
-                    except Exception as e:
-                        logger.error(f"Failed to rename file after download: {e}")
-                        import traceback
-                        traceback.print_exc()
+                self._finalize_completed_download(self.download_tasks[task_id], progress_info)
             
             return progress_info
 
+    def _finalize_completed_download(self, task_info: dict[str, Any], progress_info: dict[str, Any]) -> None:
+        """
+        下载完成后将文件重命名为标准格式
+        
+        每个任务只执行一次：并发的进度查询可能同时看到完成状态，通过_finalize_lock和finalized标志去重，
+        之后的查询直接返回已记录的最终路径
+        """
+        with self._finalize_lock:
+            if task_info.get("finalized"):
+                if task_info.get("final_path"):
+                    progress_info["final_path"] = task_info["final_path"]
+                return
+            task_info["finalized"] = True
+            
+            output_path = task_info.get("output_path")
+            source_type = task_info.get("source_type", "ce")
+            
+            if output_path and os.path.exists(output_path):
+                try:
+                    # 识别ISO版本信息
+                    image_info = self.iso_handler._identify_iso_version(output_path)
+                    
+                    # 如果识别成功，生成标准文件名并重命名
+                    if image_info.get("version") and image_info.get("build_major") and image_info.get("build_minor"):
+                        new_filename = self.iso_handler._generate_iso_filename(
+                            os_type=image_info.get("os_type", ""),
+                            version=image_info.get("version", ""),
+                            build_major=image_info.get("build_major", ""),
+                            build_minor=image_info.get("build_minor", ""),
+                            language=image_info.get("language", "zh-cn"),
+                            arch=image_info.get("arch", "x64"),
+                            source_type=source_type
+                        )
+                        
+                        # 重命名文件
+                        output_dir = os.path.dirname(output_path)
+                        new_path = os.path.join(output_dir, new_filename)
+                        if new_path != output_path:
+                            os.rename(output_path, new_path)
+                            logger.info(f"File renamed to standard format: {new_filename}")
+                            # Update path in task info
+                            task_info["output_path"] = new_path
+                            task_info["final_path"] = new_path
+                            progress_info["final_path"] = new_path
+                except Exception as e:
+                    logger.error(f"Failed to rename file after download: {e}")
+                    import traceback
+                    traceback.print_exc()
+
     def _handle_iso_cancel_download(self, params: dict[str, Any]) -> dict[str, Any]:
         """取消下载任务"""
         task_id = params.get("task_id")
@@ -990,12 +1154,18 @@ class BackendServer:
                         except (json.JSONDecodeError, TypeError):
                             pass  # 不是 JSON 字符串，继续
             
-            # 转换为 Python Configuration 对象
+            # 转换为 Python Configuration 对象并生成 XML（共享生成器，需持锁）
             from unattend_generator import config_dict_to_configuration
-            config = config_dict_to_configuration(config_dict, self.unattend_generator)
+            with self._unattend_lock:
+                config = config_dict_to_configuration(config_dict, self.unattend_generator)
+                xml_bytes = self.unattend_generator.generate_xml(config)
             
-            # 生成 XML
-            xml_bytes = self.unattend_generator.generate_xml(config)
+            # 前端请求文本格式时直接返回 XML 字符串，省去 base64 编解码及约 1/3 的体积膨胀
+            if params.get('as_text'):
+                return {
+                    "xml_text": xml_bytes.decode('utf-8'),
+                    "size": len(xml_bytes)
+                }
             
             # 返回 base64 编码的 XML（便于 JSON 传输）
             import base64
@@ -1018,17 +1188,22 @@ class BackendServer:
         
         logger = logging.getLogger('UnattendImportXml')
         try:
-            # 获取 XML 内容（base64 编码）
-            xml_base64 = params.get('xml', '')
-            if not xml_base64:
-                raise ValueError("XML content is required")
-            
-            # 解码 XML
-            import base64
-            xml_bytes = base64.b64decode(xml_base64)
+            # 获取 XML 内容：xml_text 为原始文本（无需 base64 编解码），xml 为 base64 编码（兼容旧调用）
+            xml_text = params.get('xml_text')
+            if xml_text:
+                xml_bytes = xml_text.encode('utf-8')
+            else:
+                xml_base64 = params.get('xml', '')
+                if not xml_base64:
+                    raise ValueError("XML content is required")
+                
+                # 解码 XML
+                import base64
+                xml_bytes = base64.b64decode(xml_base64)
             
             # 解析 XML
-            config_dict = self.unattend_generator.parse_xml(xml_bytes)
+            with self._unattend_lock:
+                config_dict = self.unattend_generator.parse_xml(xml_bytes)
             
             return {
                 "config": config_dict
@@ -1042,6 +1217,12 @@ class BackendServer:
         if not self.unattend_generator:
             raise Exception("Unattend generator not initialized")
         
+        # 切换语言会重新加载共享生成器的数据，与其他读取生成器的请求互斥
+        with self._unattend_lock:
+            return self._collect_unattend_data(params)
+    
+    def _collect_unattend_data(self, params: dict[str, Any]) -> dict[str, Any]:
+        """按请求的语言构建配置数据（调用方需持有_unattend_lock）"""
         logger = logging.getLogger('UnattendGetData')
         try:
             # 获取语言代码（用于 i18n 适配）
@@ -1154,8 +1335,9 @@ class BackendServer:
             
         # 生成 XML
         from unattend_generator import config_dict_to_configuration
-        config = config_dict_to_configuration(config_dict, self.unattend_generator)
-        xml_bytes = self.unattend_generator.generate_xml(config)
+        with self._unattend_lock:
+            config = config_dict_to_configuration(config_dict, self.unattend_generator)
+            xml_bytes = self.unattend_generator.generate_xml(config)
         
         def _customize_job(source_path, target_path, xml_data):
             import tempfile
@@ -1219,24 +1401,37 @@ class BackendServer:
     def _list_wim_images(self, wim_path: str) -> list[dict[str, Any]]:
         from wim_handler import WIMHandler
 
-        images: list[dict[str, Any]] = []
         with WIMHandler(wim_path) as handler:
-            image_count = handler.get_image_count()
-            for index in range(1, image_count + 1):
-                name = handler.get_image_name(index)
-                edition = handler.get_image_info(index, "edition")
-                architecture = handler.get_image_info(index, "architecture_name")
-                build = handler.get_image_info(index, "build")
-                description = handler.get_image_description(index)
-                images.append({
-                    "index": index,
-                    "name": name,
-                    "edition": edition,
-                    "architecture": architecture,
-                    "build": build,
-                    "description": description,
-                    "label": self._build_wim_image_label(index, name, edition, architecture, build),
-                })
+            return self._describe_wim_images(handler)
+
+    def _list_iso_wim_images(self, template_iso: str, install_image_iso_path: str) -> list[dict[str, Any]]:
+        """直接从 ISO 内的 WIM 头部读取 XML 元数据，无需把整个映像解压到临时目录"""
+        from iso_modifier import ISOModifier
+        from wim_handler import WIMXmlMetadata
+
+        with ISOModifier(template_iso).open_readonly() as reader:
+            with reader.open_file(install_image_iso_path) as infp:
+                metadata = WIMXmlMetadata.from_stream(infp)
+        return self._describe_wim_images(metadata)
+
+    def _describe_wim_images(self, handler: Any) -> list[dict[str, Any]]:
+        images: list[dict[str, Any]] = []
+        image_count = handler.get_image_count()
+        for index in range(1, image_count + 1):
+            name = handler.get_image_name(index)
+            edition = handler.get_image_info(index, "edition")
+            architecture = handler.get_image_info(index, "architecture_name")
+            build = handler.get_image_info(index, "build")
+            description = handler.get_image_description(index)
+            images.append({
+                "index": index,
+                "name": name,
+                "edition": edition,
+                "architecture": architecture,
+                "build": build,
+                "description": description,
+                "label": self._build_wim_image_label(index, name, edition, architecture, build),
+            })
 
         return images
 
@@ -1316,11 +1511,18 @@ class BackendServer:
         if not template_path.exists() or not template_path.is_file():
             raise ValueError("template_iso does not exist or is not a file")
 
-        with tempfile.TemporaryDirectory(prefix="deployment_wim_list_") as temp_dir:
-            install_image_iso_path = self._find_install_image_iso_path(str(template_path))
-            extracted_wim_path = Path(temp_dir) / Path(install_image_iso_path).name
-            self._extract_install_image(str(template_path), str(extracted_wim_path))
-            images = self._list_wim_images(str(extracted_wim_path))
+        from wim_handler import WIMFileError
+
+        install_image_iso_path = self._find_install_image_iso_path(str(template_path))
+        try:
+            images = self._list_iso_wim_images(str(template_path), install_image_iso_path)
+        except WIMFileError as e:
+            # 元数据无法直接读取（如 XML 资源被压缩）时，退回到解压后用 wimlib 读取
+            logger.warning(f"Falling back to extracting {install_image_iso_path}: {e}")
+            with tempfile.TemporaryDirectory(prefix="deployment_wim_list_") as temp_dir:
+                extracted_wim_path = Path(temp_dir) / Path(install_image_iso_path).name
+                self._extract_install_image(str(template_path), str(extracted_wim_path))
+                images = self._list_wim_images(str(extracted_wim_path))
 
         return {
             "install_image_path": install_image_iso_path,
@@ -1331,13 +1533,11 @@ class BackendServer:
         """集成与部署：构建带 WIM 修改和 autounattend 注入的新 ISO"""
         from deployment_build import apply_iso_plan, apply_wim_plan, build_deployment_plan
 
-        template_iso = params.get("template_iso")
-        export_dir = params.get("export_dir")
-        output_name = params.get("output_name")
-        integrate_installer = bool(params.get("integrate_installer", False))
-        file_mappings = params.get("file_mappings") or []
-        selected_wim_image_index = params.get("selected_wim_image_index")
-        config_dict = params.get("config")
+        (template_iso, export_dir, output_name, integrate_installer,
+         file_mappings, selected_wim_image_index, config_dict) = _get_deployment_build_params(
+            {**_DEPLOYMENT_BUILD_DEFAULTS, **params})
+        integrate_installer = bool(integrate_installer)
+        file_mappings = file_mappings or []
 
         if not template_iso or not export_dir or not config_dict:
             raise ValueError("Missing template_iso, export_dir, or config parameter")
@@ -1361,8 +1561,9 @@ class BackendServer:
         target_iso = str(export_dir_path / output_name)
 
         from unattend_generator import config_dict_to_configuration
-        config = config_dict_to_configuration(config_dict, self.unattend_generator)
-        xml_bytes = self.unattend_generator.generate_xml(config)
+        with self._unattend_lock:
+            config = config_dict_to_configuration(config_dict, self.unattend_generator)
+            xml_bytes = self.unattend_generator.generate_xml(config)
         validated_mappings = self._validate_file_mappings(file_mappings)
 
         def _build_job(source_path, target_path, xml_data, mappings, should_integrate_installer, selected_image_index, resolved_config, task_updater=None):
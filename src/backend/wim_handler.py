@@ -5,7 +5,9 @@ Uses non-mount approach (extract + update) for better compatibility
 """
 import sys
 import logging
+import struct
 import ctypes
+import xml.etree.ElementTree as ET
 from ctypes import wintypes
 from pathlib import Path
 from typing import Any, Optional
@@ -379,6 +381,116 @@ def _check_error(result: int, operation: str = "WIM operation") -> None:
         raise WIMFileError(f"{operation} failed: {error_str} (code: {result})")
 
 
+# ==================== WIM Header / XML Metadata ====================
+
+# WIM header (WIMHEADER_V1_PACKED): 8-byte image tag, ..., rhXmlData at offset 72.
+# Resource header (RESHDR_DISK_SHORT): 7-byte size + 1-byte flags, 8-byte offset, 8-byte original size
+WIM_HEADER_SIZE = 208
+WIM_IMAGE_TAG = b"MSWIM\x00\x00\x00"
+WIM_XML_RESHDR_OFFSET = 72
+WIM_RESHDR_FLAG_COMPRESSED = 0x04
+# Sanity limit for the XML resource (real ones are well under 1 MiB)
+WIM_XML_MAX_SIZE = 64 * 1024 * 1024
+
+
+def read_wim_xml(fp: Any) -> str:
+    """
+    Read the XML metadata resource of a WIM/ESD file straight from its header
+    
+    Only the 208-byte header and the XML resource are read, so this works on
+    any seekable stream (e.g. a file inside an ISO opened with pycdlib)
+    without wimlib and without extracting the WIM.
+    
+    Args:
+        fp: Seekable binary file object
+        
+    Returns:
+        XML document text
+        
+    Raises:
+        WIMFileError: If the header is invalid or the XML resource cannot be read
+    """
+    fp.seek(0)
+    header = fp.read(WIM_HEADER_SIZE)
+    if len(header) < WIM_HEADER_SIZE or header[:8] != WIM_IMAGE_TAG:
+        raise WIMFileError("Not a WIM file: invalid header")
+    
+    size_and_flags, offset, _original_size = struct.unpack_from("<QQQ", header, WIM_XML_RESHDR_OFFSET)
+    size = size_and_flags & 0x00FFFFFFFFFFFFFF
+    flags = size_and_flags >> 56
+    if flags & WIM_RESHDR_FLAG_COMPRESSED:
+        raise WIMFileError("Compressed XML resource is not supported")
+    if not 0 < size <= WIM_XML_MAX_SIZE:
+        raise WIMFileError(f"Invalid XML resource size: {size}")
+    
+    fp.seek(offset)
+    data = fp.read(size)
+    if len(data) != size:
+        raise WIMFileError("XML resource is truncated")
+    
+    # The XML resource is UTF-16LE with a byte order mark
+    return data.decode("utf-16-le", errors="replace").lstrip("\ufeff")
+
+
+class WIMXmlMetadata:
+    """
+    Read-only image information parsed from a WIM's XML metadata
+    
+    Offers the same lookups as WIMHandler (property paths relative to <IMAGE>),
+    for callers that only need metadata and should not depend on wimlib.
+    """
+    
+    def __init__(self, xml_text: str):
+        """
+        Args:
+            xml_text: XML document as returned by read_wim_xml
+            
+        Raises:
+            WIMFileError: If the XML cannot be parsed
+        """
+        try:
+            self._root = ET.fromstring(xml_text)
+        except ET.ParseError as e:
+            raise WIMFileError(f"Invalid WIM XML metadata: {e}")
+    
+    @classmethod
+    def from_stream(cls, fp: Any) -> 'WIMXmlMetadata':
+        """Read and parse the XML metadata of the WIM/ESD in a seekable stream"""
+        return cls(read_wim_xml(fp))
+    
+    def get_image_count(self) -> int:
+        """Get the number of images described by the metadata"""
+        return len(self._root.findall("IMAGE"))
+    
+    def get_image_property(self, image: int, property_name: str) -> Optional[str]:
+        """
+        Get a property of an image (same paths as WIMHandler.get_image_property)
+        
+        Args:
+            image: 1-based image index
+            property_name: Property path (e.g., "WINDOWS/VERSION/BUILD")
+            
+        Returns:
+            Property value string, or None if not found
+        """
+        element = self._root.find(f"IMAGE[@INDEX='{image}']/{property_name}")
+        if element is None or element.text is None:
+            return None
+        return element.text.strip()
+    
+    def get_image_name(self, image: int) -> str:
+        """Get the name of a specific image, or empty string if unnamed"""
+        return self.get_image_property(image, "NAME") or ""
+    
+    def get_image_description(self, image: int) -> Optional[str]:
+        """Get the description of a specific image"""
+        return self.get_image_property(image, "DESCRIPTION")
+    
+    def get_image_info(self, image: int, key: str) -> Any:
+        """Get a parsed information field of an image (same keys as WIMHandler.get_image_info)"""
+        return WIMHandler.get_image_info(self, image, key)
+
+
 # ==================== WIMHandler Class ====================
 
 class WIMHandler:
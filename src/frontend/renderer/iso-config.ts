@@ -911,15 +911,13 @@ class UnattendConfigManager {
     }
 
     try {
-      // 将 XML 内容转换为 base64
-      const xmlBase64 = btoa(unescape(encodeURIComponent(xmlContent)))
-
+      // 直接以文本传输 XML（JSON 字符串即可承载），无需 base64 编码
       const request = {
         jsonrpc: '2.0',
         id: 1,
         method: 'unattend_import_xml',
         params: {
-          xml: xmlBase64
+          xml_text: xmlContent
         }
       }
 
@@ -962,7 +960,8 @@ class UnattendConfigManager {
         id: 1,
         method: 'unattend_export_xml',
         params: {
-          config
+          config,
+          as_text: true
         }
       }
 
@@ -971,6 +970,10 @@ class UnattendConfigManager {
         throw new Error(response.error.message || '导出失败')
       }
 
+      if (typeof response.result?.xml_text === 'string') {
+        return response.result.xml_text
+      }
+
       // 解码 base64 返回的 XML
       if (response.result?.xml) {
         const xmlContent = decodeURIComponent(escape(atob(response.result.xml)))